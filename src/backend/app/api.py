@@ -1,25 +1,23 @@
 # backend/app/api.py
 import os
 import json
+import time
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
-from .utils.cost_tracking import log_llm_usage, Timer
-from datetime import datetime, timedelta
+from .utils.cost_tracking import log_llm_usage, Timer, usage_log_stats, usage_metrics
+from .utils import http_client
+from .utils import cache
+from .utils.singleflight import flight_stats
+from datetime import datetime
 from . import functions as funcs
+from . import cache_warmer
+from . import usage_analytics
 import logging
 
-_MED_INFO_CACHE = funcs._MED_INFO_CACHE
-_INTERACTION_CACHE = funcs._INTERACTION_CACHE
-_MED_INFO_CACHE_TIMES = funcs._MED_INFO_CACHE_TIMES
-_INTERACTION_CACHE_TIMES = funcs._INTERACTION_CACHE_TIMES
-
-# TTL for in-memory caches (seconds)
-CACHE_TTL_SECONDS = 3600  # 1 hour
-
 load_dotenv()
 
 from .models import (
@@ -46,6 +44,12 @@ limiter = Limiter(
     strategy="fixed-window"
 )
 
+# Hourly rollups over the LLM usage log, refreshed incrementally per query
+_USAGE_ANALYTICS = usage_analytics.UsageAnalytics()
+
+# Largest page /api/logs returns; full exports use format=ndjson
+MAX_LOG_PAGE_SIZE = 1000
+
 # Config from env
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
@@ -81,17 +85,6 @@ def ok_json(obj):
     return jsonify(obj)
 
 
-def _expire_cache(cache: dict, times: dict):
-    now = datetime.utcnow()
-    keys_to_delete = []
-    for key, ts in times.items():
-        if now - ts > timedelta(seconds=CACHE_TTL_SECONDS):
-            keys_to_delete.append(key)
-    for key in keys_to_delete:
-        cache.pop(key, None)
-        times.pop(key, None)
-
-
 # -----------------------
 # Error handler for rate limit exceeded
 # -----------------------
@@ -156,7 +149,10 @@ def route_explain_medication():
 
     except Exception as e:
         logger.error(f"Unexpected error in explain endpoint: {str(e)}")
-        # Return fallback response
+        # Prefer the last good explanation for this drug over the generic fallback
+        stale = funcs.stale_explanation(medication_name)
+        if stale:
+            return jsonify(stale), 200
         return jsonify(FALLBACK_RESPONSES["explain"]), 200
 
 
@@ -304,6 +300,64 @@ def route_check_interactions():
         ).model_dump()), 500
 
 
+# -----------------------
+# Endpoint: what interacts with X (precomputed interaction index)
+# -----------------------
+@app.route("/api/interactions/<path:medication_name>", methods=["GET"])
+@limiter.limit("30 per minute")
+def route_interacting_drugs(medication_name):
+    """
+    List every drug the interaction index links to a medication, with the
+    label passage each link comes from.
+    Rate limit: 30 requests per minute
+    """
+    try:
+        res = funcs.get_interacting_drugs(medication_name.strip())
+        if res.get("status") == "error":
+            return jsonify(res), 404
+        return jsonify(res)
+    except Exception as e:
+        logger.error(f"Unexpected error in interactions endpoint: {str(e)}")
+        return jsonify(ErrorResponse(
+            message="Failed to retrieve interacting drugs",
+            code="server_error",
+            details={"error": str(e)}
+        ).model_dump()), 500
+
+
+# -----------------------
+# Endpoint: medication name autocomplete (in-memory prefix index)
+# -----------------------
+@app.route("/api/medications/autocomplete", methods=["GET"])
+@limiter.exempt
+def route_autocomplete_medications():
+    """
+    Complete a partial medication name from the brand and generic names in the
+    label store. Served from memory without upstream calls, so it is called
+    per keystroke.
+    Rate limit: none
+    """
+    try:
+        query = request.args.get("q", "").strip()
+        limit = int(request.args.get("limit", 10))
+    except ValueError as e:
+        return jsonify(ErrorResponse(
+            message="Invalid request",
+            code="bad_request",
+            details={"error": str(e)}
+        ).model_dump()), 400
+
+    try:
+        return jsonify(funcs.autocomplete_medications(query, limit))
+    except Exception as e:
+        logger.error(f"Unexpected error in autocomplete endpoint: {str(e)}")
+        return jsonify(ErrorResponse(
+            message="Failed to complete medication name",
+            code="server_error",
+            details={"error": str(e)}
+        ).model_dump()), 500
+
+
 # -----------------------
 # Endpoint: log interaction query
 # -----------------------
@@ -341,6 +395,151 @@ def route_log_query():
         ).model_dump()), 500
 
 
+# -----------------------
+# Chat helpers, shared with the async view in asgi.py
+# -----------------------
+CHAT_MAX_RETRIES = 2
+CHAT_RETRY_DELAY = 1  # seconds
+
+# Gemini function declarations
+CHAT_TOOLS = [
+    {
+        "function_declarations": [
+            {
+                "name": "check_multiple_interactions",
+                "description": "Check drug-drug interactions among multiple medications using FDA and RxNorm data.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "medications": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "List of medication names to check"
+                        }
+                    },
+                    "required": ["medications"]
+                }
+            },
+            {
+                "name": "get_medication_info",
+                "description": "Get detailed information about a specific medication from FDA databases.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "medication_name": {"type": "string"},
+                        "include_interactions": {"type": "boolean"},
+                        "include_side_effects": {"type": "boolean"}
+                    },
+                    "required": ["medication_name"]
+                }
+            },
+            {
+                "name": "generate_explanation",
+                "description": "Generate a plain-language explanation of a medication with readability score.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "medication_name": {"type": "string"}
+                    },
+                    "required": ["medication_name"]
+                }
+            }
+        ]
+    }
+]
+
+CHAT_FUNCTIONS = {tool["name"] for tool in CHAT_TOOLS[0]["function_declarations"]}
+
+
+def chat_request(prompt: str) -> tuple:
+    """
+    Build the Gemini request for a chat prompt: (headers, payload).
+    """
+    request_payload = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "tools": CHAT_TOOLS,
+        "generation_config": {"temperature": 0.0}
+    }
+
+    headers = {"Content-Type": "application/json"}
+    if GEMINI_API_KEY:
+        headers["x-goog-api-key"] = GEMINI_API_KEY
+    return headers, request_payload
+
+
+def log_chat_usage(model_response: dict, latency_ms: int):
+    usage = model_response.get("usageMetadata", {})
+    log_llm_usage(
+        endpoint="/api/chat",
+        model=GEMINI_MODEL,
+        tokens_input=usage.get("promptTokenCount", 0),
+        tokens_output=usage.get("candidatesTokenCount", 0),
+        latency_ms=latency_ms,
+        cache_hit=False
+    )
+
+
+def _content_items(candidate: dict) -> list:
+    content = candidate.get("content", [])
+    if isinstance(content, dict):
+        content = [content]
+    return content if isinstance(content, list) else []
+
+
+def _parts(item: dict) -> list:
+    parts = item.get("parts", [])
+    if isinstance(parts, dict):
+        parts = [parts]
+    return parts if isinstance(parts, list) else []
+
+
+def chat_function_call(model_response: dict):
+    """
+    First functionCall part in a Gemini response, or None.
+    """
+    for cand in model_response.get("candidates", []):
+        for msg in _content_items(cand):
+            if not isinstance(msg, dict):
+                continue
+            for part in _parts(msg):
+                if isinstance(part, dict) and "functionCall" in part:
+                    return part["functionCall"]
+    return None
+
+
+def chat_text(model_response: dict) -> str:
+    """
+    Text of the first candidate in a Gemini response.
+    """
+    candidates = model_response.get("candidates", [])
+    if not candidates:
+        return "(No text returned)"
+    content = _content_items(candidates[0])
+    if not content:
+        return "(No text returned)"
+
+    item = content[0]
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        for p in _parts(item):
+            if isinstance(p, dict) and "text" in p:
+                return p["text"]
+    return "(No text returned)"
+
+
+def run_chat_function(name: str, args: dict):
+    if name == "check_multiple_interactions":
+        return funcs.check_multiple_interactions(args.get("medications", []))
+    if name == "get_medication_info":
+        return funcs.get_medication_info(
+            args.get("medication_name"),
+            args.get("include_interactions", False),
+            args.get("include_side_effects", True)
+        )
+    return funcs.generate_explanation(args.get("medication_name"))
+
+
 # -----------------------
 # Endpoint: chat (LLM function-calling)
 # -----------------------
@@ -362,166 +561,52 @@ def route_chat():
         logger.error(f"Error parsing chat request: {str(e)}")
         return jsonify({"status": "error", "message": "Invalid request"}), 400
 
-    # Build request for Gemini with function declarations
-    tools = [
-        {
-            "function_declarations": [
-                {
-                    "name": "check_multiple_interactions",
-                    "description": "Check drug-drug interactions among multiple medications using FDA and RxNorm data.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "medications": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "List of medication names to check"
-                            }
-                        },
-                        "required": ["medications"]
-                    }
-                },
-                {
-                    "name": "get_medication_info",
-                    "description": "Get detailed information about a specific medication from FDA databases.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "medication_name": {"type": "string"},
-                            "include_interactions": {"type": "boolean"},
-                            "include_side_effects": {"type": "boolean"}
-                        },
-                        "required": ["medication_name"]
-                    }
-                },
-                {
-                    "name": "generate_explanation",
-                    "description": "Generate a plain-language explanation of a medication with readability score.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "medication_name": {"type": "string"}
-                        },
-                        "required": ["medication_name"]
-                    }
-                }
-            ]
-        }
-    ]
-
-    request_payload = {
-        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
-        "tools": tools,
-        "generation_config": {"temperature": 0.0}
-    }
-
-    headers = {"Content-Type": "application/json"}
-    if GEMINI_API_KEY:
-        headers["x-goog-api-key"] = GEMINI_API_KEY
+    headers, request_payload = chat_request(prompt)
 
     # Call Gemini with retry logic
-    max_retries = 2
-    retry_delay = 1  # seconds
-
-    for attempt in range(max_retries + 1):
+    for attempt in range(CHAT_MAX_RETRIES + 1):
         try:
             with Timer() as t:
-                resp = requests.post(GEMINI_API_URL, headers=headers, json=request_payload, timeout=30)
+                resp = http_client.post(GEMINI_API_URL, headers=headers, json=request_payload, timeout=30)
 
             resp.raise_for_status()
             model_response = resp.json()
-
-            usage = model_response.get("usageMetadata", {})
-            tokens_input = usage.get("promptTokenCount", 0)
-            tokens_output = usage.get("candidatesTokenCount", 0)
-
-            log_llm_usage(
-                endpoint="/api/chat",
-                model=GEMINI_MODEL,
-                tokens_input=tokens_input,
-                tokens_output=tokens_output,
-                latency_ms=t.elapsed_ms,
-                cache_hit=False
-            )
+            log_chat_usage(model_response, t.elapsed_ms)
 
             break  # Success, exit retry loop
 
         except requests.exceptions.Timeout:
-            logger.warning(f"Gemini API timeout (attempt {attempt + 1}/{max_retries + 1})")
-            if attempt == max_retries:
+            logger.warning(f"Gemini API timeout (attempt {attempt + 1}/{CHAT_MAX_RETRIES + 1})")
+            if attempt == CHAT_MAX_RETRIES:
                 return jsonify(FALLBACK_RESPONSES["chat"]), 200
-            import time
-            time.sleep(retry_delay)
+            time.sleep(CHAT_RETRY_DELAY)
 
         except requests.exceptions.HTTPError as e:
             logger.error(f"Gemini API HTTP error: {e}")
-            if attempt == max_retries:
+            if attempt == CHAT_MAX_RETRIES:
                 return jsonify(FALLBACK_RESPONSES["chat"]), 200
-            import time
-            time.sleep(retry_delay)
+            time.sleep(CHAT_RETRY_DELAY)
 
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
-            if attempt == max_retries:
+            if attempt == CHAT_MAX_RETRIES:
                 return jsonify(FALLBACK_RESPONSES["chat"]), 200
-            import time
-            time.sleep(retry_delay)
-
-    # Parse function call
-    function_call = None
-    args = {}
-
-    candidates = model_response.get("candidates", [])
-    for cand in candidates:
-        content = cand.get("content", [])
-
-        if isinstance(content, dict):
-            content = [content]
-        if not isinstance(content, list):
-            continue
-
-        for msg in content:
-            if isinstance(msg, str):
-                continue
-
-            if isinstance(msg, dict):
-                parts = msg.get("parts", [])
-                if isinstance(parts, dict):
-                    parts = [parts]
-                if not isinstance(parts, list):
-                    continue
-
-                for part in parts:
-                    if isinstance(part, dict) and "functionCall" in part:
-                        function_call = part["functionCall"]
-                        args = function_call.get("args", {})
-                        break
-
-        if function_call:
-            break
+            time.sleep(CHAT_RETRY_DELAY)
 
     # Execute function with error handling
+    function_call = chat_function_call(model_response)
     if function_call:
         name = function_call.get("name")
 
-        try:
-            if name == "check_multiple_interactions":
-                result = funcs.check_multiple_interactions(args.get("medications", []))
-            elif name == "get_medication_info":
-                result = funcs.get_medication_info(
-                    args.get("medication_name"),
-                    args.get("include_interactions", False),
-                    args.get("include_side_effects", True)
-                )
-            elif name == "generate_explanation":
-                result = funcs.generate_explanation(args.get("medication_name"))
-            else:
-                logger.warning(f"Unknown function called: {name}")
-                return jsonify({
-                    "status": "error",
-                    "message": f"Unknown function `{name}`"
-                }), 400
+        if name not in CHAT_FUNCTIONS:
+            logger.warning(f"Unknown function called: {name}")
+            return jsonify({
+                "status": "error",
+                "message": f"Unknown function `{name}`"
+            }), 400
 
+        try:
+            result = run_chat_function(name, function_call.get("args", {}))
             return jsonify({
                 "status": "success",
                 "via": "gemini:function_call",
@@ -538,34 +623,10 @@ def route_chat():
             }), 500
 
     # No function call - return text
-    text = "(No text returned)"
-
-    if candidates:
-        first = candidates[0]
-        content = first.get("content", [])
-
-        if isinstance(content, dict):
-            content = [content]
-
-        if isinstance(content, list) and len(content) > 0:
-            item = content[0]
-
-            if isinstance(item, str):
-                text = item
-            elif isinstance(item, dict):
-                parts = item.get("parts", [])
-                if isinstance(parts, dict):
-                    parts = [parts]
-                if isinstance(parts, list):
-                    for p in parts:
-                        if isinstance(p, dict) and "text" in p:
-                            text = p["text"]
-                            break
-
     return jsonify({
         "status": "success",
         "via": "gemini:text",
-        "text": text
+        "text": chat_text(model_response)
     })
 
 
@@ -577,10 +638,7 @@ def route_flush_cache():
     Rate limit: 5 requests per minute
     """
     try:
-        _MED_INFO_CACHE.clear()
-        _INTERACTION_CACHE.clear()
-        _MED_INFO_CACHE_TIMES.clear()
-        _INTERACTION_CACHE_TIMES.clear()
+        cache.flush_all()
         logger.info("All caches flushed")
         return jsonify({"status": "success", "message": "All caches cleared."})
     except Exception as e:
@@ -599,10 +657,9 @@ def route_expire_cache():
     Rate limit: 10 requests per minute
     """
     try:
-        _expire_cache(_MED_INFO_CACHE, _MED_INFO_CACHE_TIMES)
-        _expire_cache(_INTERACTION_CACHE, _INTERACTION_CACHE_TIMES)
-        logger.info("Expired old cache entries")
-        return jsonify({"status": "success", "message": "Expired old cache entries."})
+        expired = cache.expire_all()
+        logger.info(f"Expired old cache entries: {expired}")
+        return jsonify({"status": "success", "message": "Expired old cache entries.", "expired": expired})
     except Exception as e:
         logger.error(f"Error expiring cache: {str(e)}")
         return jsonify(ErrorResponse(
@@ -611,19 +668,103 @@ def route_expire_cache():
         ).model_dump()), 500
 
 
+@app.route("/api/cache/stats", methods=["GET"])
+@limiter.limit("30 per minute")
+def route_cache_stats():
+    """
+    Size, hit/miss, eviction and expiration counters for every cache, plus how
+    many concurrent misses were coalesced onto an in-flight request.
+    Rate limit: 30 requests per minute
+    """
+    return jsonify({"status": "success", "caches": cache.cache_stats(), "coalescing": flight_stats()})
+
+
+@app.route("/api/cache/invalidate", methods=["POST"])
+@limiter.limit("10 per minute")
+def route_invalidate_cache():
+    """
+    Invalidate cached results for specific medications.
+    Accepts the change list written by `label_ingest --sync` (or any body with a
+    "medications" list).
+    Rate limit: 10 requests per minute
+    """
+    try:
+        payload = request.get_json(force=True)
+        medications = payload.get("medications", [])
+        if not isinstance(medications, list):
+            raise ValueError("medications must be a list")
+    except Exception as e:
+        logger.error(f"Error parsing cache invalidate request: {str(e)}")
+        return jsonify(ErrorResponse(
+            message="Invalid request",
+            code="bad_request",
+            details={"error": str(e)}
+        ).model_dump()), 400
+
+    try:
+        res = funcs.invalidate_medications(medications)
+        logger.info(f"Invalidated {res['invalidated']} cache entries for {len(res['medications'])} medications")
+        return jsonify(res)
+    except Exception as e:
+        logger.error(f"Error invalidating cache: {str(e)}")
+        return jsonify(ErrorResponse(
+            message="Failed to invalidate cache",
+            code="server_error"
+        ).model_dump()), 500
+
+
+@app.route("/api/cache/warm", methods=["POST"])
+@limiter.limit("5 per minute")
+def route_warm_cache():
+    """
+    Start a background warm-up of label lookups and explanations for the most
+    requested medications (configured list, golden set, query history).
+    Progress is reported by /api/health.
+    Rate limit: 5 requests per minute
+    """
+    started = cache_warmer.start_background_warmup()
+    return jsonify({
+        "status": "success",
+        "message": "Cache warm-up started." if started else "Cache warm-up already running.",
+        "progress": cache_warmer.warm_progress()
+    }), 202 if started else 200
+
+
 @app.route("/api/logs", methods=["GET"])
 @limiter.limit("30 per minute")
 def route_get_logs():
     """
-    Retrieve interaction query logs.
+    Retrieve interaction query logs, oldest first, one page at a time.
+    Query: cursor (next_cursor of the previous page), limit (default 100,
+    max 1000); format=ndjson streams every retained entry instead.
     Rate limit: 30 requests per minute
     """
+    if request.args.get("format") == "ndjson":
+        def export():
+            for record in funcs._LOG_STORE:
+                yield json.dumps(record.to_dict()) + "\n"
+        return Response(export(), mimetype="application/x-ndjson")
+
     try:
-        logs = list(funcs._LOG_STORE.values())
+        cursor = int(request.args.get("cursor", 0))
+        limit = min(int(request.args.get("limit", 100)), MAX_LOG_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify(ErrorResponse(
+            message="Invalid request",
+            code="bad_request",
+            details={"error": str(e)}
+        ).model_dump()), 400
+
+    try:
+        page = funcs._LOG_STORE.page(cursor, limit)
         return jsonify({
             "status": "success",
-            "count": len(logs),
-            "logs": logs
+            "count": len(page["records"]),
+            "total": len(funcs._LOG_STORE),
+            "logs": [record.to_dict() for record in page["records"]],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"],
+            "skipped": page["skipped"]
         })
     except Exception as e:
         logger.error(f"Error retrieving logs: {str(e)}")
@@ -633,6 +774,52 @@ def route_get_logs():
         ).model_dump()), 500
 
 
+@app.route("/api/analytics/usage", methods=["GET"])
+@limiter.limit("30 per minute")
+def route_usage_analytics():
+    """
+    LLM cost, tokens, cache-hit ratio and latency percentiles from the usage
+    log, grouped by time bucket, endpoint and model.
+    Query: start/end (ISO or relative like 7d, default last 7 days), bucket
+    (hour, day, week, total), group_by (endpoint,model), endpoint, model.
+    Rate limit: 30 requests per minute
+    """
+    try:
+        start = usage_analytics.parse_time(request.args.get("start", "7d"))
+        end = usage_analytics.parse_time(request.args["end"]) if request.args.get("end") else None
+        group_by = [f.strip() for f in request.args.get("group_by", "endpoint,model").split(",") if f.strip()]
+        res = _USAGE_ANALYTICS.query(start, end, request.args.get("bucket", "day"), group_by,
+                                     request.args.get("endpoint"), request.args.get("model"))
+    except ValueError as e:
+        return jsonify(ErrorResponse(
+            message="Invalid request",
+            code="bad_request",
+            details={"error": str(e)}
+        ).model_dump()), 400
+    except Exception as e:
+        logger.error(f"Error building usage analytics: {str(e)}")
+        return jsonify(ErrorResponse(
+            message="Failed to build usage analytics",
+            code="server_error"
+        ).model_dump()), 500
+    return jsonify({"status": "success", "data": res})
+
+
+@app.route("/api/metrics/usage", methods=["GET"])
+@limiter.exempt
+def route_usage_metrics():
+    """
+    Rolling 1m/1h/24h LLM calls, tokens, cost, spend rate and latency
+    percentiles per endpoint and model, from memory (no log file reads).
+    Rate limit: none
+    """
+    return jsonify({
+        "status": "success",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "windows": usage_metrics()
+    })
+
+
 @app.route("/api/health", methods=["GET"])
 @limiter.exempt
 def route_health():
@@ -643,9 +830,17 @@ def route_health():
         "services": {
             "openfda": "operational",
             "gemini": "operational" if GEMINI_API_KEY else "not_configured"
-        }
+        },
+        "http_pools": http_client.pool_stats(),
+        "cache_warming": cache_warmer.warm_progress(),
+        "usage_log": usage_log_stats()
     })
 
 
+# Warm caches for the most requested medications without delaying startup
+if cache_warmer.WARM_ON_STARTUP:
+    cache_warmer.start_background_warmup()
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=int(os.getenv("PORT", 5000)))
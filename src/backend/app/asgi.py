@@ -0,0 +1,213 @@
+# backend/app/asgi.py
+"""
+ASGI entry point: uvicorn backend.app.asgi:app
+
+The LLM routes (/api/explain and /api/chat) are served natively on the event
+loop, so a slow Gemini call or a retry back-off holds no thread and one process
+can keep hundreds of them in flight. Every other route, and CORS preflight, is
+passed to the Flask app, which runs in a thread pool.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from limits import parse
+
+from . import api
+from . import functions as funcs
+from .models import ErrorResponse
+from .utils import async_http_client
+from .utils.cost_tracking import Timer
+
+logger = logging.getLogger(__name__)
+
+# Threads serving the Flask routes
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", 16))
+
+_flask = WSGIMiddleware(api.app, workers=ASGI_WSGI_THREADS)
+
+# Same limits as the Flask views, counted in the Flask limiter's storage
+EXPLAIN_LIMIT = parse("10 per minute")
+CHAT_LIMIT = parse("15 per minute")
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status: int, data):
+    body = json.dumps(data).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"access-control-allow-origin", b"*"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _allowed(scope, path: str, limit) -> bool:
+    if not api.limiter.enabled:
+        return True
+    client = scope.get("client")
+    address = client[0] if client else "127.0.0.1"
+    return api.limiter.limiter.hit(limit, "asgi", path, address)
+
+
+async def explain(body: bytes) -> tuple:
+    """
+    Async /api/explain; same responses as api.route_explain_medication.
+    """
+    try:
+        payload = json.loads(body)
+        medication_name = payload.get("medication_name", "").strip()
+
+        if not medication_name:
+            return 400, ErrorResponse(
+                message="medication_name is required",
+                code="bad_request"
+            ).model_dump()
+
+    except Exception as e:
+        logger.error(f"Error parsing explain request: {str(e)}")
+        return 400, ErrorResponse(
+            message="Invalid request",
+            code="bad_request",
+            details={"error": str(e)}
+        ).model_dump()
+
+    try:
+        result = await funcs.generate_explanation_async(medication_name)
+
+        # Log the query attempt, successful or not
+        funcs.log_interaction_query(
+            medications=[medication_name],
+            interactions_found=0,
+            severity_level="none"
+        )
+        if result.get("status") == "error":
+            return 404, result
+        return 200, result
+
+    except Exception as e:
+        logger.error(f"Unexpected error in explain endpoint: {str(e)}")
+        # Prefer the last good explanation for this drug over the generic fallback
+        stale = await asyncio.to_thread(funcs.stale_explanation, medication_name)
+        if stale:
+            return 200, stale
+        return 200, api.FALLBACK_RESPONSES["explain"]
+
+
+async def chat(body: bytes) -> tuple:
+    """
+    Async /api/chat; same responses as api.route_chat. Retries back off with
+    asyncio.sleep instead of blocking a worker.
+    """
+    try:
+        prompt = json.loads(body).get("prompt", "")
+
+        if not prompt:
+            return 400, {"status": "error", "message": "Missing prompt"}
+
+    except Exception as e:
+        logger.error(f"Error parsing chat request: {str(e)}")
+        return 400, {"status": "error", "message": "Invalid request"}
+
+    headers, request_payload = api.chat_request(prompt)
+
+    for attempt in range(api.CHAT_MAX_RETRIES + 1):
+        try:
+            with Timer() as t:
+                resp = await async_http_client.post(api.GEMINI_API_URL, headers=headers, json=request_payload, timeout=30)
+
+            resp.raise_for_status()
+            model_response = resp.json()
+            api.log_chat_usage(model_response, t.elapsed_ms)
+            break
+
+        except httpx.TimeoutException:
+            logger.warning(f"Gemini API timeout (attempt {attempt + 1}/{api.CHAT_MAX_RETRIES + 1})")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Gemini API HTTP error: {e}")
+        except Exception as e:
+            logger.error(f"Gemini API error: {str(e)}")
+
+        if attempt == api.CHAT_MAX_RETRIES:
+            return 200, api.FALLBACK_RESPONSES["chat"]
+        await asyncio.sleep(api.CHAT_RETRY_DELAY)
+
+    function_call = api.chat_function_call(model_response)
+    if not function_call:
+        return 200, {"status": "success", "via": "gemini:text", "text": api.chat_text(model_response)}
+
+    name = function_call.get("name")
+    if name not in api.CHAT_FUNCTIONS:
+        logger.warning(f"Unknown function called: {name}")
+        return 400, {"status": "error", "message": f"Unknown function `{name}`"}
+
+    args = function_call.get("args", {})
+    try:
+        if name == "generate_explanation":
+            result = await funcs.generate_explanation_async(args.get("medication_name"))
+        else:
+            # Interaction checks and label lookups read the local stores; keep them off the loop
+            result = await asyncio.to_thread(api.run_chat_function, name, args)
+    except Exception as e:
+        logger.error(f"Function execution error for {name}: {str(e)}")
+        return 500, {"status": "error", "message": f"Function `{name}` failed", "details": str(e)}
+
+    return 200, {"status": "success", "via": "gemini:function_call", "function": name, "result": result}
+
+
+# path -> (handler, rate limit)
+ROUTES = {
+    "/api/explain": (explain, EXPLAIN_LIMIT),
+    "/api/chat": (chat, CHAT_LIMIT),
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await async_http_client.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    route = ROUTES.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+    if route is None:
+        await _flask(scope, receive, send)
+        return
+
+    handler, limit = route
+    body = await _read_body(receive)
+    if not _allowed(scope, scope["path"], limit):
+        await _send_json(send, 429, ErrorResponse(
+            message="Rate limit exceeded. Please try again later.",
+            code="unavailable",
+            details={"retry_after": str(limit)}
+        ).model_dump())
+        return
+
+    status, data = await handler(body)
+    await _send_json(send, status, data)
@@ -0,0 +1,91 @@
+# backend/app/async_rag_service.py
+
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from .rag_service import (RAGService, _LABEL_CACHE, _PROMPT_CACHE, _label_missing, _explanation_failed,
+                          PROMPT_VERSION, NEGATIVE_CACHE_TTL)
+from .explanation_store import explanation_key
+from .utils.revalidate import cached_load_async
+from .utils.singleflight import AsyncSingleFlight
+from .utils import async_http_client
+from .utils.cost_tracking import Timer
+
+# Coalesce concurrent identical misses on the event loop
+_LABEL_FLIGHT = AsyncSingleFlight("labels_async")
+_EXPLAIN_FLIGHT = AsyncSingleFlight("explanations_async")
+
+
+class AsyncRAGService:
+    """
+    Explanation generation for the ASGI app (see asgi.py). Upstream calls go
+    through the async HTTP client, so a slow OpenFDA or Gemini call holds no
+    thread while it waits; local label store and explanation store reads run
+    in worker threads. Indexes, caches, prompt building and parsing are those
+    of the wrapped RAGService.
+    """
+
+    def __init__(self, rag: RAGService):
+        self.rag = rag
+
+    async def find_drug_label(self, medication_name: str) -> Optional[Dict]:
+        # Same cache entries and negative caching as RAGService._search_openfda_drug_label
+        lookup = await cached_load_async(_LABEL_CACHE, _LABEL_FLIGHT, self.rag.canonical_name(medication_name),
+                                         lambda: self._load_drug_label(medication_name),
+                                         is_error=_label_missing, cache_errors=NEGATIVE_CACHE_TTL)
+        return lookup.value
+
+    async def _load_drug_label(self, medication_name: str) -> Optional[Dict]:
+        label = await asyncio.to_thread(self.rag._find_local_label, medication_name)
+        if not label and self.rag.live_fallback:
+            label = await self._fetch_openfda_drug_label(medication_name)
+        return label
+
+    async def _fetch_openfda_drug_label(self, medication_name: str) -> Optional[Dict]:
+        url, params = self.rag._label_search_request([medication_name], limit=1)
+        try:
+            response = await async_http_client.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("results"):
+                return data["results"][0]
+            return None
+        except httpx.HTTPError as e:
+            print(f"OpenFDA API error: {e}")
+            return None
+
+    async def explain(self, medication_name: str, gemini_api_key: str) -> Dict:
+        """
+        Async RAGService.generate_plain_language_explanation, sharing its cache.
+        """
+        cache_key = f"explain:{self.rag.canonical_name(medication_name)}"
+        lookup = await cached_load_async(_PROMPT_CACHE, _EXPLAIN_FLIGHT, cache_key,
+                                         lambda: self._generate_explanation(medication_name, gemini_api_key),
+                                         is_error=_explanation_failed)
+        return self.rag._explanation_result(lookup)
+
+    async def _generate_explanation(self, medication_name: str, gemini_api_key: str) -> Dict:
+        label = await self.find_drug_label(medication_name)
+        med_info = self.rag._label_to_info(label, medication_name)
+        if not med_info.get("found"):
+            return {"success": False, "message": med_info.get("message")}
+
+        selected_model, url, headers, payload = self.rag._build_explanation_request(med_info, medication_name, gemini_api_key)
+        store_key = explanation_key(label, medication_name, selected_model, PROMPT_VERSION)
+        stored = await asyncio.to_thread(self.rag._stored_explanation, store_key)
+        if stored:
+            return stored
+
+        try:
+            with Timer() as t:
+                response = await async_http_client.post(url, headers=headers, json=payload, timeout=30)
+                response.raise_for_status()
+                result = response.json()
+
+            entry = self.rag._finish_explanation(selected_model, result, t.elapsed_ms, med_info)
+            return await asyncio.to_thread(self.rag._save_explanation, store_key, entry)
+
+        except Exception as e:
+            return {"success": False, "message": f"Failed to generate explanation: {str(e)}"}
@@ -0,0 +1,196 @@
+# backend/app/cache_warmer.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from . import functions as funcs
+from .utils.cost_tracking import CostMeter
+
+GOLDEN_SET_PATH = os.getenv(
+    "GOLDEN_SET_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "tests", "golden_set.json")
+)
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "false").lower() == "true"
+WARM_MEDICATIONS = [m.strip() for m in os.getenv("WARM_MEDICATIONS", "").split(",") if m.strip()]
+WARM_LIMIT = int(os.getenv("WARM_LIMIT", 100))
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", 4))
+WARM_MAX_SPEND_USD = float(os.getenv("WARM_MAX_SPEND_USD", 0.50))
+
+_PROGRESS = {"state": "idle"}
+_PROGRESS_LOCK = threading.Lock()
+
+
+def golden_set_medications(path: str = GOLDEN_SET_PATH) -> List[str]:
+    """
+    Medication queries tagged top_100 in the golden set.
+    """
+    try:
+        with open(path) as f:
+            entries = json.load(f).get("golden_set", [])
+    except (OSError, ValueError) as e:
+        print(f"Could not read golden set: {e}")
+        return []
+    return [e["query"] for e in entries if "top_100" in e.get("tags", []) and e.get("query", "").strip()]
+
+
+def _most_frequent(medication_lists) -> List[str]:
+    counts = Counter()
+    for medications in medication_lists:
+        counts.update(m for m in medications if m and m.strip())
+    return [name for name, _ in counts.most_common()]
+
+
+def query_log_medications() -> List[str]:
+    """
+    Medications from this process's query log, most frequent first. Empty in
+    a CLI process; use exported_log_medications there.
+    """
+    return _most_frequent(record.medications for record in funcs._LOG_STORE)
+
+
+def exported_log_medications(path: str) -> List[str]:
+    """
+    Medications from a query log export (GET /api/logs?format=ndjson),
+    most frequent first.
+    """
+    def medication_lists():
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line).get("medications") or []
+                except ValueError:
+                    continue  # torn last line of an interrupted export
+    return _most_frequent(medication_lists())
+
+
+def warm_list(limit: int = WARM_LIMIT, query_log_path: str = None) -> List[str]:
+    """
+    Configured medications first, then the golden set, then query history
+    (this process's log, or the export at query_log_path); de-duplicated by
+    normalized name.
+    """
+    history = exported_log_medications(query_log_path) if query_log_path else query_log_medications()
+    seen, medications = set(), []
+    for name in WARM_MEDICATIONS + golden_set_medications() + history:
+        key = funcs._normalize_name(name)
+        if key not in seen:
+            seen.add(key)
+            medications.append(name.strip())
+    return medications[:limit]
+
+
+def warn_if_short(medications: List[str], limit: int):
+    """
+    CLI warning for a medication list shorter than requested.
+    """
+    if len(medications) < limit:
+        print(f"Warning: only {len(medications)} medications found (requested {limit}); "
+              f"pass a query log export or a medications file for more.", file=sys.stderr)
+
+
+def _update(**fields):
+    with _PROGRESS_LOCK:
+        _PROGRESS.update(fields)
+
+
+def _bump(field: str, amount=1):
+    with _PROGRESS_LOCK:
+        _PROGRESS[field] = _PROGRESS.get(field, 0) + amount
+
+
+def warm_progress() -> Dict:
+    with _PROGRESS_LOCK:
+        return dict(_PROGRESS)
+
+
+def _warm_one(medication_name: str, explain: bool, max_spend_usd: float):
+    try:
+        info = funcs.get_medication_info(medication_name)
+        if info.get("status") == "success":
+            _bump("labels_warmed")
+        else:
+            _bump("not_found")
+            return
+
+        if not explain:
+            return
+        if warm_progress()["spend_usd"] >= max_spend_usd:
+            _bump("explanations_skipped")
+            return
+        with CostMeter() as meter:
+            result = funcs.generate_explanation(medication_name)
+        _bump("spend_usd", meter.cost_usd)
+        _bump("explanations_warmed" if result.get("status") == "success" else "errors")
+    except Exception as e:
+        print(f"Cache warm-up failed for {medication_name}: {e}")
+        _bump("errors")
+    finally:
+        _bump("completed")
+
+
+def warm_caches(medications: List[str] = None, concurrency: int = WARM_CONCURRENCY,
+                max_spend_usd: float = WARM_MAX_SPEND_USD, explain: bool = True) -> Dict:
+    """
+    Preload label lookups, med-info and explanations for the most requested
+    medications, at most `concurrency` at a time. Explanations stop once this
+    run's LLM spend reaches max_spend_usd (in-flight calls may overshoot it by
+    up to concurrency - 1 calls).
+    """
+    medications = warm_list() if medications is None else medications
+    explain = explain and bool(os.getenv("GEMINI_API_KEY"))
+    start = time.time()
+    _update(state="running", started_at=start, finished_at=None, total=len(medications), completed=0,
+            labels_warmed=0, not_found=0, explanations_warmed=0, explanations_skipped=0, errors=0,
+            spend_usd=0.0, max_spend_usd=max_spend_usd)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="cache-warm") as pool:
+        for name in medications:
+            pool.submit(_warm_one, name, explain, max_spend_usd)
+
+    _update(state="done", finished_at=time.time(), seconds=round(time.time() - start, 2))
+    progress = warm_progress()
+    progress["spend_usd"] = round(progress["spend_usd"], 6)
+    return progress
+
+
+def start_background_warmup() -> bool:
+    """
+    Run warm_caches on a daemon thread unless a run is already in progress.
+    """
+    with _PROGRESS_LOCK:
+        if _PROGRESS.get("state") == "running":
+            return False
+        _PROGRESS["state"] = "running"
+    threading.Thread(target=warm_caches, name="cache-warmup", daemon=True).start()
+    return True
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Preload caches for the most requested medications.")
+    parser.add_argument("--medications", help="comma-separated list (default: configured + golden set + query log)")
+    parser.add_argument("--query-log", help="query log export (GET /api/logs?format=ndjson) to rank medications by")
+    parser.add_argument("--limit", type=int, default=WARM_LIMIT, help="number of medications from the default list")
+    parser.add_argument("--concurrency", type=int, default=WARM_CONCURRENCY)
+    parser.add_argument("--max-spend", type=float, default=WARM_MAX_SPEND_USD, help="LLM spend cap in USD")
+    parser.add_argument("--no-explanations", action="store_true", help="only warm label lookups")
+    args = parser.parse_args(argv)
+
+    if args.medications:
+        medications = [m.strip() for m in args.medications.split(",") if m.strip()]
+    else:
+        # The query log lives in the API process; this process only sees an export of it
+        medications = warm_list(args.limit, args.query_log)
+        warn_if_short(medications, args.limit)
+    print(json.dumps(warm_caches(medications, args.concurrency, args.max_spend, not args.no_explanations)))
+
+
+if __name__ == "__main__":
+    # python -m backend.app.cache_warmer --query-log query_log.ndjson --max-spend 0.25
+    main()
@@ -0,0 +1,157 @@
+# backend/app/explanation_precompute.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from . import functions as funcs
+from .rag_service import RAGService
+from .cache_warmer import warm_list, warn_if_short
+from .utils.cost_tracking import CostMeter
+
+PRECOMPUTE_PROGRESS_PATH = os.getenv("PRECOMPUTE_PROGRESS_PATH", "precompute_progress.jsonl")
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", 4))
+
+# Statuses that count as finished; anything else is retried on the next run
+DONE_STATUSES = {"generated", "stored", "not_found"}
+
+
+def load_progress(path: str) -> Dict[str, Dict]:
+    """
+    Latest progress record per medication from a previous (possibly interrupted) run.
+    """
+    progress = {}
+    if not os.path.exists(path):
+        return progress
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            progress[record["medication"].strip().lower()] = record
+    return progress
+
+
+def precompute_one(rag: RAGService, medication_name: str, gemini_api_key: str) -> Dict:
+    """
+    Generate (or find already stored) the explanation for one medication and
+    report what it cost.
+    """
+    start = time.time()
+    with CostMeter() as meter:
+        try:
+            result = rag.generate_plain_language_explanation(medication_name, gemini_api_key)
+        except Exception as e:
+            result = {"success": False, "message": str(e)}
+    record = {
+        "medication": medication_name,
+        "seconds": round(time.time() - start, 3),
+        "llm_calls": meter.calls,
+        "cost_usd": round(meter.cost_usd, 6),
+    }
+    if result.get("success"):
+        record["status"] = "generated" if meter.calls else "stored"
+        record["reading_level"] = result["reading_level"]
+        record["reading_level_description"] = result["reading_level_description"]
+    elif "No information found" in (result.get("message") or ""):
+        record["status"] = "not_found"
+    else:
+        record["status"] = "error"
+        record["message"] = result.get("message")
+    return record
+
+
+def precompute(medications: List[str], gemini_api_key: str, workers: int = PRECOMPUTE_WORKERS,
+               max_spend_usd: float = None, progress_path: str = PRECOMPUTE_PROGRESS_PATH) -> Dict:
+    """
+    Generate explanations for `medications` into the explanation store, at most
+    `workers` at a time. Each finished medication is appended to progress_path,
+    so an interrupted run resumes where it stopped. Returns a per-drug cost and
+    time report.
+    """
+    start = time.time()
+    done = {name: record for name, record in load_progress(progress_path).items()
+            if record.get("status") in DONE_STATUSES}
+    todo = [m for m in medications if m.strip().lower() not in done]
+
+    # Reuse the process-wide service so its label and synonym indexes are loaded once
+    rag = funcs.rag
+    lock = threading.Lock()
+    spent = [0.0]
+    records = []
+
+    def run(medication_name: str):
+        with lock:
+            over_budget = max_spend_usd is not None and spent[0] >= max_spend_usd
+        if over_budget:
+            record = {"medication": medication_name, "status": "skipped_budget", "seconds": 0, "llm_calls": 0,
+                      "cost_usd": 0.0}
+        else:
+            record = precompute_one(rag, medication_name, gemini_api_key)
+        with lock:
+            spent[0] += record["cost_usd"]
+            records.append(record)
+            with open(progress_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="precompute") as pool:
+        list(pool.map(run, todo))
+
+    statuses = {}
+    for record in records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    return {
+        "requested": len(medications),
+        "resumed_done": len(medications) - len(todo),
+        "processed": len(records),
+        "statuses": statuses,
+        "cost_usd": round(spent[0], 6),
+        "seconds": round(time.time() - start, 2),
+        "drugs": sorted(records, key=lambda r: r["medication"].lower()),
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Generate explanations for the top medications ahead of time.")
+    parser.add_argument("--top", type=int, default=300, help="number of medications")
+    # The query log lives in the API process, so the list must come from a file
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--medications-file", help="file with one medication per line")
+    source.add_argument("--query-log", help="query log export (GET /api/logs?format=ndjson); configured and "
+                                            "golden-set medications first, then the most queried")
+    parser.add_argument("--workers", type=int, default=PRECOMPUTE_WORKERS, help="parallel generations")
+    parser.add_argument("--max-spend", type=float, default=None, help="stop generating after this many USD")
+    parser.add_argument("--progress", default=PRECOMPUTE_PROGRESS_PATH, help="resumable progress log")
+    parser.add_argument("--report", default=None, help="write the per-drug report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        print("GEMINI_API_KEY not configured.")
+        sys.exit(1)
+
+    if args.medications_file:
+        with open(args.medications_file) as f:
+            medications = [line.strip() for line in f if line.strip()][:args.top]
+    else:
+        medications = warm_list(args.top, args.query_log)
+    warn_if_short(medications, args.top)
+
+    report = precompute(medications, gemini_api_key, args.workers, args.max_spend, args.progress)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        report = {key: value for key, value in report.items() if key != "drugs"}
+        report["report"] = args.report
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    # python -m backend.app.explanation_precompute --query-log query_log.ndjson --top 300 --workers 4 --report precompute_report.json
+    main()
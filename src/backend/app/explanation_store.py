@@ -0,0 +1,93 @@
+# backend/app/explanation_store.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from .label_store import base_drug_name, normalize_label_name
+
+# Generated explanations survive restarts here, so each one is paid for once per label version
+EXPLANATION_STORE_PATH = os.getenv("EXPLANATION_STORE_PATH", "explanations.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS explanations (
+    drug TEXT NOT NULL,
+    set_id TEXT NOT NULL,
+    effective_time TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (drug, set_id, effective_time, model, prompt_version)
+);
+"""
+
+
+def explanation_key(label: Dict, medication_name: str, model: str, prompt_version: str) -> Optional[tuple]:
+    """
+    (drug, set_id, effective_time, model, prompt_version) identifying an
+    explanation; None when the label carries no version to key on.
+    """
+    if not label or not label.get("set_id"):
+        return None
+    generic = label.get("openfda", {}).get("generic_name", [])
+    drug = base_drug_name(generic[0]) if generic else normalize_label_name(medication_name)
+    return drug, label["set_id"], label.get("effective_time") or "", model, prompt_version
+
+
+class ExplanationStore:
+    """
+    On-disk (SQLite) store of generated explanations. An entry is reused until
+    the label it was generated from, the model or the prompt template changes,
+    since any of those changes its key.
+    """
+
+    def __init__(self, path: str = EXPLANATION_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        try:
+            row = self._connect().execute(
+                "SELECT data FROM explanations WHERE drug = ? AND set_id = ? AND effective_time = ? "
+                "AND model = ? AND prompt_version = ?",
+                key
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Explanation store error: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: tuple, entry: Dict):
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO explanations "
+                    "(drug, set_id, effective_time, model, prompt_version, data, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    key + (json.dumps(entry), time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"Explanation store error: {e}")
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
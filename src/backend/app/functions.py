@@ -1,30 +1,140 @@
+import asyncio
 import uuid
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 from .rag_service import RAGService
+from .async_rag_service import AsyncRAGService
+from .utils.cache import make_cache
+from .utils.singleflight import SingleFlight
+from .utils.revalidate import cached_load, Lookup
+from .utils.query_log import QueryLog
 
 # Initialize RAG service
 rag = RAGService()
+# Async explanations for the ASGI app, on the same indexes and caches
+arag = AsyncRAGService(rag)
 
 # In-memory caches for prompt/function results
-_MED_INFO_CACHE = {}
-_INTERACTION_CACHE = {}
+_MED_INFO_CACHE = make_cache("med_info", maxsize=int(os.getenv("MED_INFO_CACHE_SIZE", 2000)))
+# Assembled responses per medication list; the per-pair results they are built from are
+# memoized separately in rag_service, so overlapping lists share work
+_INTERACTION_CACHE = make_cache("interactions", maxsize=int(os.getenv("INTERACTION_CACHE_SIZE", 2000)))
+_MED_INFO_FLIGHT = SingleFlight("med_info")
+_INTERACTION_FLIGHT = SingleFlight("interactions")
 
-# Track cache entry timestamps for TTL
-_MED_INFO_CACHE_TIMES = {}
-_INTERACTION_CACHE_TIMES = {}
+# Upper bound on medications per interaction check (polypharmacy lists)
+MAX_INTERACTION_MEDICATIONS = int(os.getenv("MAX_INTERACTION_MEDICATIONS", 50))
+
+# Misspelled names are corrected to the best fuzzy match when it scores at least this
+# and beats the runner-up by FUZZY_AUTOCORRECT_MARGIN; otherwise suggestions are returned
+FUZZY_AUTOCORRECT_SCORE = float(os.getenv("FUZZY_AUTOCORRECT_SCORE", 0.85))
+FUZZY_AUTOCORRECT_MARGIN = float(os.getenv("FUZZY_AUTOCORRECT_MARGIN", 0.05))
+
+# Upper bound on completions per autocomplete request
+MAX_AUTOCOMPLETE_RESULTS = int(os.getenv("MAX_AUTOCOMPLETE_RESULTS", 20))
 
 def _normalize_name(name: str) -> str:
     return name.strip().lower()
 
 
+def _is_error(result: Dict) -> bool:
+    return result.get("status") == "error"
+
+
+def _is_partial(result: Dict) -> bool:
+    return bool(result.get("data", {}).get("timed_out"))
+
+
+def _with_staleness(lookup: Lookup) -> Dict:
+    """
+    Return a cached result, flagged when it was served past its TTL.
+    """
+    if lookup.stale:
+        return dict(lookup.value, stale=True)
+    return lookup.value
+
+
+def _missing_name(medication_name) -> Optional[Dict]:
+    """
+    Error for an absent or blank medication name (chat tool calls pass
+    whatever the model sent), else None.
+    """
+    if not isinstance(medication_name, str) or not medication_name.strip():
+        return {"status": "error", "message": "medication_name is required"}
+    return None
+
+
+def _canonical_key(medication_name: str) -> str:
+    """
+    Cache identity of a medication: normalized, with aliases (brand names,
+    salt forms) resolved to their canonical drug.
+    """
+    return rag.canonical_name(_normalize_name(medication_name))
+
+
+def _autocorrect(medication_name: str) -> Optional[str]:
+    """
+    Canonical drug an unknown, misspelled name confidently matches, if any.
+    """
+    if not rag.synonyms.is_available() or rag.synonyms.resolve(medication_name):
+        return None
+    suggestions = rag.suggest_names(medication_name, limit=2)
+    if not suggestions or suggestions[0]["score"] < FUZZY_AUTOCORRECT_SCORE:
+        return None
+    if len(suggestions) > 1 and suggestions[0]["score"] - suggestions[1]["score"] < FUZZY_AUTOCORRECT_MARGIN:
+        return None
+    return suggestions[0]["canonical"]
+
+
 def get_medication_info(medication_name: str, include_interactions: bool = False,
                         include_side_effects: bool = True) -> Dict:
-    cache_key = f"med_info:{medication_name}:{include_interactions}:{include_side_effects}"
-    if cache_key in _MED_INFO_CACHE:
-        return _MED_INFO_CACHE[cache_key]
+    missing = _missing_name(medication_name)
+    if missing:
+        return missing
+    # Pick up indexes rebuilt by an ingest in any worker process
+    rag.sync_indexes()
+    # Correct confident misspellings before any cache lookup or I/O
+    requested = medication_name
+    corrected = _autocorrect(medication_name)
+    if corrected:
+        medication_name = corrected
 
+    # One base record per drug; option flags are applied as projections of it
+    cache_key = f"med_info:{_canonical_key(medication_name)}"
+    result = _with_staleness(cached_load(
+        _MED_INFO_CACHE, _MED_INFO_FLIGHT, cache_key,
+        lambda: _load_medication_info(medication_name),
+        is_error=_is_error
+    ))
+    if _is_error(result):
+        suggestions = rag.suggest_names(requested)
+        if suggestions:
+            result = dict(result, suggestions=[s["name"] for s in suggestions])
+        return result
+
+    result = _project_medication_info(result, include_interactions, include_side_effects)
+    if corrected:
+        result["corrected_from"] = requested
+        result["corrected_to"] = corrected
+    return result
+
+
+def _project_medication_info(record: Dict, include_interactions: bool, include_side_effects: bool) -> Dict:
+    """
+    Shape a cached base record for the requested options. Lists are shared
+    with the cached record, not copied.
+    """
+    base = record["data"]
+    data = {key: value for key, value in base.items() if key != "interactions"}
+    if not include_side_effects:
+        data["side_effects"] = None
+    if include_interactions and base.get("interactions"):
+        data["interactions"] = base["interactions"]
+    return dict(record, data=data)
+
+
+def _load_medication_info(medication_name: str) -> Dict:
     med_info = rag.extract_medication_info(medication_name)
 
     if not med_info.get("found"):
@@ -33,46 +143,44 @@ def get_medication_info(medication_name: str, include_interactions: bool = False
             "message": med_info.get("message", f"Medication '{medication_name}' not found.")
         }
 
-    interactions = None
-    if include_interactions and med_info.get("interactions"):
-        interactions = []
-        for it in med_info["interactions"]:
-            interactions.append({
-                "description": it.get("description", ""),
-                "source": it.get("source", "FDA")
-            })
-
     data = {
         "generic_name": med_info.get("generic_name"),
         "brand_names": med_info.get("brand_names", []),
         "drug_class": med_info.get("drug_class"),
         "uses": med_info.get("uses", []),
         "common_dosage": med_info.get("dosage"),
-        "side_effects": med_info.get("side_effects", []) if include_side_effects else None,
+        "side_effects": med_info.get("side_effects", []),
         "warnings": med_info.get("warnings", []),
-        "sources": med_info.get("sources", [])
+        "sources": med_info.get("sources", []),
+        "interactions": [
+            {"description": it.get("description", ""), "source": it.get("source", "FDA")}
+            for it in med_info.get("interactions", [])
+        ]
     }
 
-    if interactions is not None:
-        data["interactions"] = interactions
-
-    result = {"status": "success", "data": data}
-    _MED_INFO_CACHE[cache_key] = result
-    _MED_INFO_CACHE_TIMES[cache_key] = datetime.utcnow()
-    return result
+    return {"status": "success", "data": data}
 
 
 def check_multiple_interactions(medications: List[str]) -> Dict:
-    meds = list(dict.fromkeys([m.strip() for m in medications if m.strip()]))
+    rag.sync_indexes()
+    if not isinstance(medications, list):
+        medications = []
+    meds = list(dict.fromkeys([m.strip() for m in medications if isinstance(m, str) and m.strip()]))
     cache_key = f"interactions:{','.join(sorted(meds))}"
-    if cache_key in _INTERACTION_CACHE:
-        return _INTERACTION_CACHE[cache_key]
 
     if len(meds) < 2:
         return {"status": "error", "message": "At least 2 medications are required."}
-    if len(meds) > 5:
-        meds = meds[:5]
+    if len(meds) > MAX_INTERACTION_MEDICATIONS:
+        meds = meds[:MAX_INTERACTION_MEDICATIONS]
+
+    # Partial results (some label lookups timed out) are returned but not cached
+    return _with_staleness(cached_load(
+        _INTERACTION_CACHE, _INTERACTION_FLIGHT, cache_key,
+        lambda: _check_interactions_uncached(meds), is_error=_is_partial
+    ))
+
 
+def _check_interactions_uncached(meds: List[str]) -> Dict:
     result = rag.check_interactions(meds)
 
     final_result = {
@@ -91,22 +199,108 @@ def check_multiple_interactions(medications: List[str]) -> Dict:
         }
     }
 
-    _INTERACTION_CACHE[cache_key] = final_result
-    _INTERACTION_CACHE_TIMES[cache_key] = datetime.utcnow()
+    if result.get("timed_out"):
+        final_result["data"]["timed_out"] = result["timed_out"]
     return final_result
 
 
+def autocomplete_medications(query: str, limit: int = 10) -> Dict:
+    rag.sync_indexes()
+    completions = rag.complete_names(query, max(1, min(limit, MAX_AUTOCOMPLETE_RESULTS)))
+    return {
+        "status": "success",
+        "data": {
+            "query": query,
+            "completions": completions
+        }
+    }
+
+
+def get_interacting_drugs(medication_name: str) -> Dict:
+    missing = _missing_name(medication_name)
+    if missing:
+        return missing
+    rag.sync_indexes()
+    result = rag.interacting_drugs(medication_name)
+    if not result.get("found"):
+        return {"status": "error", "message": result.get("message")}
+    return {
+        "status": "success",
+        "data": {
+            "medication": result["medication"],
+            "canonical_name": result["canonical_name"],
+            "total": len(result["interacts_with"]),
+            "interacts_with": result["interacts_with"],
+            "sources": result["sources"]
+        }
+    }
+
+
+def invalidate_medications(medication_names: List[str]) -> Dict:
+    """
+    Drop cached med-info, interaction and explanation results that involve any of
+    the given medications (e.g. the change list from a label delta sync).
+    Indexes are reloaded first, so names resolve to their new canonical drugs.
+    """
+    rag.sync_indexes(force=True)
+    names = {_normalize_name(n) for n in medication_names if n and n.strip()}
+    drugs = names | {_canonical_key(n) for n in names}
+    removed = _MED_INFO_CACHE.delete_where(lambda key: key[len("med_info:"):] in drugs)
+    # Interaction keys hold the names as requested; "advil,warfarin" must go when ibuprofen changes
+    removed += _INTERACTION_CACHE.delete_where(
+        lambda key: any(_canonical_key(m) in drugs for m in key[len("interactions:"):].split(","))
+    )
+    removed += rag.invalidate(list(names))
+    return {"status": "success", "invalidated": removed, "medications": sorted(names)}
+
+
 def generate_explanation(medication_name: str) -> Dict:
+    missing = _missing_name(medication_name)
+    if missing:
+        return missing
+    rag.sync_indexes()
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     if not gemini_api_key:
-        return {"status": "error", "message": "GEMINI_API_KEY not configured"}
+        return _precomputed_explanation(medication_name)
 
     result = rag.generate_plain_language_explanation(medication_name, gemini_api_key)
+    return _explanation_response(medication_name, result)
 
+
+async def generate_explanation_async(medication_name: str) -> Dict:
+    missing = _missing_name(medication_name)
+    if missing:
+        return missing
+    await asyncio.to_thread(rag.sync_indexes)
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        return await asyncio.to_thread(_precomputed_explanation, medication_name)
+
+    result = await arag.explain(medication_name, gemini_api_key)
+    return _explanation_response(medication_name, result)
+
+
+def _precomputed_explanation(medication_name: str) -> Dict:
+    # Without an LLM key only explanations generated ahead of time can be served
+    result = rag.precomputed_explanation(medication_name)
+    if not result:
+        return {"status": "error", "message": "GEMINI_API_KEY not configured"}
+    return _explanation_response(medication_name, result)
+
+
+def stale_explanation(medication_name: str) -> Optional[Dict]:
+    """
+    Last good explanation for a medication, however old, or None.
+    """
+    result = rag.stale_explanation(medication_name)
+    return _explanation_response(medication_name, result) if result else None
+
+
+def _explanation_response(medication_name: str, result: Dict) -> Dict:
     if not result.get("success"):
         return {"status": "error", "message": result.get("message", "Failed to generate explanation")}
 
-    return {
+    response = {
         "status": "success",
         "data": {
             "medication_name": medication_name,
@@ -117,24 +311,22 @@ def generate_explanation(medication_name: str) -> Dict:
             "retrieved_data": result["medication_info"]
         }
     }
+    if result.get("stale"):
+        response["stale"] = True
+        response["generated_at"] = datetime.utcfromtimestamp(result["generated_at"]).isoformat() + "Z"
+    return response
 
 
 # In-memory "log store"
-_LOG_STORE = {}
+# Most recent queries only; older entries are overwritten once the buffer is full
+QUERY_LOG_CAPACITY = int(os.getenv("QUERY_LOG_CAPACITY", 10000))
+_LOG_STORE = QueryLog(QUERY_LOG_CAPACITY)
 _FEEDBACK_STORE = {}
 
 def log_interaction_query(medications: List[str], interactions_found: int,
                           severity_level: str = "none", timestamp=None) -> dict:
-    log_id = f"log_{uuid.uuid4().hex[:12]}"
-    entry = {
-        "log_id": log_id,
-        "medications": medications,
-        "interactions_found": interactions_found,
-        "severity_level": severity_level,
-        "timestamp": timestamp or datetime.utcnow().isoformat() + "Z"
-    }
-    _LOG_STORE[log_id] = entry
-    return {"status": "success", "log_id": log_id, "message": "Query logged successfully."}
+    record = _LOG_STORE.append(medications, interactions_found, severity_level, timestamp)
+    return {"status": "success", "log_id": record.log_id, "message": "Query logged successfully."}
 
 
 def submit_feedback(explanation_id: str, user_id: str, feedback_type: str, comment: str = None) -> Dict:
@@ -0,0 +1,230 @@
+# backend/app/interaction_graph.py
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from .label_store import LabelStore, LABEL_STORE_PATH, bump_index_generation
+from .synonym_index import ABBREVIATIONS, SynonymIndex, build_synonyms, replace_synonyms, canonical_drug
+from .utils.multi_pattern import MultiPatternMatcher
+
+PASSAGE_CHARS = 500      # size of the source passage an edge points to
+PASSAGE_LEAD = 200       # how far before the mention the passage may start
+MIN_PATTERN_LENGTH = 3   # shorter names produce too many false mentions
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interaction_edges (
+    drug TEXT NOT NULL,
+    other TEXT NOT NULL,
+    set_id TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    PRIMARY KEY (drug, other)
+);
+CREATE INDEX IF NOT EXISTS idx_interaction_edges_other ON interaction_edges(other);
+"""
+
+
+def passage_bounds(text: str, start: int) -> tuple:
+    """
+    Bounds of the passage around a mention, starting at a sentence boundary
+    when one is close enough.
+    """
+    lead = max(0, start - PASSAGE_LEAD)
+    sentence = text.rfind(". ", lead, start)
+    begin = sentence + 2 if sentence != -1 else lead
+    return begin, min(len(text), begin + PASSAGE_CHARS)
+
+
+def graph_exists(store_path: str = LABEL_STORE_PATH) -> bool:
+    """
+    Whether build_graph has been run against the store.
+    """
+    if not os.path.exists(store_path):
+        return False
+    conn = sqlite3.connect(store_path)
+    try:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'interaction_edges'"
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def build_graph(store_path: str = LABEL_STORE_PATH) -> Dict:
+    """
+    Scan every stored label's drug_interactions section once and write a
+    drug -> interacting drug adjacency index (with a pointer to the source
+    passage) into the label store. The synonym index is rebuilt first so
+    both agree on canonical drugs.
+    """
+    start_time = time.time()
+    store = LabelStore(store_path)
+
+    # Pass 1: resolve every brand/generic/substance name to a canonical drug
+    drug_names = build_synonyms(store)
+
+    # Labels name other drugs by generic, salt or brand name, so every corpus name is scanned
+    # for and mapped to its canonical drug; abbreviations are too ambiguous in free text
+    canonicals = set(drug_names.values())
+    patterns = {name: canonical for name, canonical in drug_names.items()
+                if len(name) >= MIN_PATTERN_LENGTH and ABBREVIATIONS.get(name) != canonical}
+    matcher = MultiPatternMatcher(patterns)
+
+    # Pass 2: one scan per interaction section
+    edges = {}
+    labels_scanned = 0
+    for label in store.iter_labels():
+        canonical = canonical_drug(label)
+        sections = label.get("drug_interactions")
+        if not canonical or not sections:
+            continue
+        labels_scanned += 1
+        text = sections[0]
+        for other, (start, _) in matcher.find_first(text).items():
+            if other != canonical and (canonical, other) not in edges:
+                edges[(canonical, other)] = (label["set_id"],) + passage_bounds(text, start)
+
+    store.close()
+
+    # Synonyms and edges are replaced together, so workers reload a consistent pair
+    conn = sqlite3.connect(store_path)
+    conn.executescript(_SCHEMA)
+    with conn:
+        replace_synonyms(conn, drug_names)
+        conn.execute("DELETE FROM interaction_edges")
+        conn.executemany(
+            "INSERT INTO interaction_edges (drug, other, set_id, start, end) VALUES (?, ?, ?, ?, ?)",
+            [(drug, other) + pointer for (drug, other), pointer in edges.items()]
+        )
+        bump_index_generation(conn)
+    conn.close()
+
+    return {
+        "names": len(drug_names),
+        "drugs": len(canonicals),
+        "labels_scanned": labels_scanned,
+        "edges": len(edges),
+        "seconds": round(time.time() - start_time, 2),
+    }
+
+
+class InteractionGraph:
+    """
+    Read side of the precomputed interaction index. The adjacency is loaded into
+    memory on first use so pair checks and reverse lookups are dict lookups.
+    Names resolve to canonical drugs through the synonym index.
+    """
+
+    def __init__(self, store: LabelStore, synonyms: SynonymIndex = None):
+        self.store = store
+        self.synonyms = synonyms or SynonymIndex(store)
+        self._lock = threading.Lock()
+        self._loaded = False
+        # (built, edges, neighbors), replaced as a whole so readers never see a mix
+        self._graph = (False, {}, {})
+
+    def _read_graph(self) -> tuple:
+        edges = {}
+        neighbors = defaultdict(set)
+        if not self.store.is_available():
+            return False, edges, neighbors
+        conn = sqlite3.connect(self.store.path)
+        try:
+            for drug, other, set_id, start, end in conn.execute(
+                    "SELECT drug, other, set_id, start, end FROM interaction_edges"):
+                edges[(drug, other)] = (set_id, start, end)
+                neighbors[drug].add(other)
+                neighbors[other].add(drug)
+            return True, edges, neighbors
+        except sqlite3.OperationalError:
+            # Graph not built yet
+            return False, {}, {}
+        finally:
+            conn.close()
+
+    def _load(self) -> tuple:
+        if self._loaded:
+            return self._graph
+        with self._lock:
+            if not self._loaded:
+                self._graph = self._read_graph()
+                self._loaded = True
+        return self._graph
+
+    def reload(self):
+        # Read the new adjacency first; requests keep using the old one until the swap
+        graph = self._read_graph()
+        with self._lock:
+            self._graph = graph
+            self._loaded = True
+
+    def is_available(self) -> bool:
+        built = self._load()[0]
+        return built and self.synonyms.is_available()
+
+    def canonical(self, medication_name: str) -> Optional[str]:
+        return self.synonyms.resolve(medication_name)
+
+    def edge(self, drug: str, other: str) -> Optional[tuple]:
+        """
+        Pointer (set_id, start, end) to the label passage linking two canonical
+        drugs, checking both labels' interaction sections.
+        """
+        edges = self._load()[1]
+        return edges.get((drug, other)) or edges.get((other, drug))
+
+    def neighbors(self, drug: str) -> List[Dict]:
+        """
+        Drugs that interact with `drug`, in either direction.
+        """
+        _, edges, neighbors = self._load()
+        result = []
+        for other in sorted(neighbors.get(drug, ())):
+            if (drug, other) in edges:
+                result.append({"drug": other, "direction": "listed_in_label", "pointer": edges[(drug, other)]})
+            else:
+                result.append({"drug": other, "direction": "lists_this_drug", "pointer": edges[(other, drug)]})
+        return result
+
+    def passage(self, pointer: tuple) -> Optional[str]:
+        set_id, start, end = pointer
+        label = self.store.get_label(set_id)
+        if not label or not label.get("drug_interactions"):
+            return None
+        return label["drug_interactions"][0][start:end]
+
+    def passages(self, pointers: List[tuple]) -> List[Optional[str]]:
+        """
+        passage() for many pointers; each source label is read and parsed
+        once, however many pointers share it.
+        """
+        labels = self.store.get_labels(sorted({set_id for set_id, _, _ in pointers}))
+        sections = {set_id: (label.get("drug_interactions") or [None])[0] for set_id, label in labels.items()}
+        result = []
+        for set_id, start, end in pointers:
+            text = sections.get(set_id)
+            result.append(text[start:end] if text else None)
+        return result
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Build the drug interaction index from the label store.")
+    parser.add_argument("--db", default=LABEL_STORE_PATH, help="label store path")
+    args = parser.parse_args(argv)
+
+    if not LabelStore(args.db).is_available():
+        print(f"Label store not found at {args.db}; run label_ingest first.")
+        sys.exit(1)
+    print(json.dumps(build_graph(args.db)))
+
+
+if __name__ == "__main__":
+    # python -m backend.app.interaction_graph --db labels.db
+    main()
@@ -0,0 +1,286 @@
+# backend/app/label_ingest.py
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import zipfile
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List
+
+from .label_store import LabelStore, LABEL_STORE_PATH, slim_label, label_row
+from .synonym_index import build_synonym_index
+from .interaction_graph import build_graph, graph_exists
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+CHUNK_SIZE = 1 << 20  # characters read from a zip member per step
+BATCH_SIZE = 500      # labels per worker task / write transaction
+
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_END = re.compile(r'["\\]')
+
+
+class ResultsArrayScanner:
+    """
+    Incrementally split the top-level "results" array of an openFDA export into
+    the raw JSON text of each label, without parsing the labels themselves.
+    Only the label currently being read is kept in memory.
+    """
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.string_start = 0
+        self.last_key = None
+        self.in_results = False
+        self.item_start = None
+
+    def feed(self, text: str) -> List[str]:
+        buf = self.buf + text
+        pos = self.pos
+        items = []
+        while True:
+            if self.in_string:
+                m = _STRING_END.search(buf, pos)
+                if not m:
+                    pos = len(buf)
+                    break
+                if m.group() == "\\":
+                    if m.end() >= len(buf):
+                        # Escape sequence split across chunks; retry on next feed
+                        pos = m.start()
+                        break
+                    pos = m.end() + 1
+                    continue
+                self.in_string = False
+                if self.depth == 1:
+                    self.last_key = buf[self.string_start:m.start()]
+                pos = m.end()
+                continue
+
+            m = _STRUCTURAL.search(buf, pos)
+            if not m:
+                pos = len(buf)
+                break
+            ch = m.group()
+            pos = m.end()
+            if ch == '"':
+                self.in_string = True
+                self.string_start = pos
+            elif ch in "{[":
+                if ch == "[" and self.depth == 1 and self.last_key == "results":
+                    self.in_results = True
+                elif ch == "{" and self.in_results and self.depth == 2:
+                    self.item_start = m.start()
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.in_results and self.depth == 2 and self.item_start is not None:
+                    items.append(buf[self.item_start:pos])
+                    self.item_start = None
+                elif self.in_results and self.depth == 1:
+                    self.in_results = False
+
+        # Drop everything already consumed
+        keep = pos
+        if self.item_start is not None:
+            keep = min(keep, self.item_start)
+        if self.in_string:
+            keep = min(keep, self.string_start)
+        self.buf = buf[keep:]
+        self.pos = pos - keep
+        if self.item_start is not None:
+            self.item_start -= keep
+        if self.in_string:
+            self.string_start -= keep
+        return items
+
+
+def iter_raw_labels(path: str) -> Iterator[str]:
+    """
+    Stream the raw JSON text of every label in a drug-label-*.json.zip file.
+    """
+    with zipfile.ZipFile(path) as zf:
+        for member in zf.namelist():
+            if not member.endswith(".json"):
+                continue
+            scanner = ResultsArrayScanner()
+            with zf.open(member) as raw:
+                stream = io.TextIOWrapper(raw, encoding="utf-8")
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield from scanner.feed(chunk)
+
+
+def iter_batches(paths: List[str], batch_size: int = BATCH_SIZE) -> Iterator[List[str]]:
+    batch = []
+    for path in paths:
+        for raw in iter_raw_labels(path):
+            batch.append(raw)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def parse_batch(raw_labels: List[str]) -> List[tuple]:
+    """
+    Worker: parse raw label JSON, keep only the fields the app uses and
+    serialize the store rows.
+    """
+    rows = []
+    for raw in raw_labels:
+        row = label_row(slim_label(json.loads(raw)))
+        if row:
+            rows.append(row)
+    return rows
+
+
+def peak_rss_mb() -> Dict:
+    if resource is None:
+        return {"main": None, "workers": None}
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "main": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def select_changed(stored: Dict[str, tuple], rows: List[tuple]) -> List[tuple]:
+    """
+    Keep only rows whose set_id is new or whose version/effective_time differs
+    from the stored label ({set_id: (version, effective_time)}).
+    """
+    return [row for row in rows if stored.get(row[0]) != (row[2], row[3])]
+
+
+def change_entry(store_versions: Dict[str, tuple], store_names: Dict[str, List[str]], row: tuple) -> Dict:
+    set_id, _, version, effective_time, _, names = row
+    names = [name for name, _ in names]
+    return {
+        "set_id": set_id,
+        "change": "updated" if set_id in store_versions else "added",
+        "version": version,
+        "effective_time": effective_time,
+        "names": names,
+        # Names the label no longer carries still key cached results
+        "previous_names": sorted(set(store_names.get(set_id, ())) - set(names)),
+    }
+
+
+def ingest(paths: List[str], store_path: str = LABEL_STORE_PATH, workers: int = None,
+           batch_size: int = BATCH_SIZE, sync: bool = False) -> Dict:
+    """
+    Stream bulk label files through a process pool into the label store.
+    At most two batches per worker are in flight, so memory stays bounded
+    regardless of the export size.
+
+    With sync=True only labels whose set_id/version/effective_time changed are
+    written, and the result includes a change list for cache invalidation.
+    """
+    store = LabelStore(store_path)
+    store.tune_for_bulk_load()
+    written = 0
+    unchanged = 0
+    changes = []
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    start = time.time()
+
+    def write(rows):
+        nonlocal written, unchanged
+        if sync:
+            stored = store.get_versions([row[0] for row in rows])
+            changed = select_changed(stored, rows)
+            unchanged += len(rows) - len(changed)
+            names = store.get_names([row[0] for row in changed if row[0] in stored])
+            changes.extend(change_entry(stored, names, row) for row in changed)
+            rows = changed
+        written += store.upsert_rows(rows)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for batch in iter_batches(paths, batch_size):
+            pending.add(pool.submit(parse_batch, batch))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+        for future in pending:
+            write(future.result())
+
+    store.close()
+    # Rebuild the indexes derived from the labels, so a reload never reads stale edges
+    if graph_exists(store_path):
+        index = build_graph(store_path)
+    else:
+        index = build_synonym_index(store_path)
+    elapsed = time.time() - start
+    stats = {
+        "labels": written,
+        "synonyms": index["names"],
+        "seconds": round(elapsed, 2),
+        "labels_per_sec": round(written / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if "edges" in index:
+        stats["edges"] = index["edges"]
+    if sync:
+        stats["unchanged"] = unchanged
+        stats["changes"] = changes
+    return stats
+
+
+def change_list(changes: List[Dict]) -> Dict:
+    """
+    Change list document; POST it to /api/cache/invalidate to drop cached
+    results for exactly the medications whose labels changed.
+    """
+    medications = sorted({name for change in changes
+                          for name in change["names"] + change.get("previous_names", [])})
+    return {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "changes": changes,
+        "medications": medications,
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Load openFDA drug-label bulk files into the label store.")
+    parser.add_argument("files", nargs="+", help="drug-label-*.json.zip files")
+    parser.add_argument("--db", default=LABEL_STORE_PATH, help="label store path")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--sync", action="store_true",
+                        help="only upsert labels whose set_id/version/effective_time changed")
+    parser.add_argument("--changes-out", default="label_changes.json",
+                        help="where --sync writes the change list")
+    args = parser.parse_args(argv)
+
+    stats = ingest(args.files, args.db, args.workers, args.batch_size, sync=args.sync)
+    if args.sync:
+        changes = stats.pop("changes")
+        with open(args.changes_out, "w") as f:
+            json.dump(change_list(changes), f, indent=2)
+        stats["changed"] = len(changes)
+        stats["changes_out"] = args.changes_out
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    # python -m backend.app.label_ingest drug-label-0001-of-0013.json.zip ...
+    main()
@@ -0,0 +1,302 @@
+# backend/app/label_store.py
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Local copy of the openFDA drug-label corpus (built from the bulk download)
+LABEL_STORE_PATH = os.getenv("LABEL_STORE_PATH", "labels.db")
+
+# Bumped whenever the synonym index or interaction graph is rebuilt
+_GENERATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    generation INTEGER NOT NULL
+);
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    set_id TEXT PRIMARY KEY,
+    label_id TEXT,
+    version TEXT,
+    effective_time TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS label_names (
+    name TEXT NOT NULL,
+    set_id TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_label_names_name ON label_names(name);
+CREATE INDEX IF NOT EXISTS idx_label_names_set_id ON label_names(set_id);
+""" + _GENERATION_SCHEMA
+
+
+# Label sections kept in the store (everything extract_medication_info reads)
+LABEL_FIELDS = (
+    "indications_and_usage",
+    "dosage_and_administration",
+    "adverse_reactions",
+    "warnings",
+    "boxed_warning",
+    "drug_interactions",
+)
+OPENFDA_FIELDS = ("brand_name", "generic_name", "substance_name", "pharm_class_epc")
+VERSION_FIELDS = ("set_id", "id", "version", "effective_time")
+
+
+# Salt/hydrate words dropped to get the base drug ("warfarin sodium" -> "warfarin")
+SALT_WORDS = {
+    "sodium", "disodium", "potassium", "calcium", "magnesium", "zinc", "silver",
+    "hydrochloride", "hcl", "dihydrochloride", "hydrobromide", "hydroiodide",
+    "sulfate", "bisulfate", "phosphate", "maleate", "mesylate", "besylate", "tosylate", "napsylate",
+    "edisylate", "tartrate", "bitartrate", "succinate", "ethylsuccinate", "citrate", "acetate",
+    "fumarate", "bromide", "chloride", "carbonate", "bicarbonate", "oxalate", "hyclate",
+    "propionate", "dipropionate", "valerate", "furoate", "acetonide", "nitrate", "gluconate",
+    "lactate", "lactobionate", "stearate", "estolate", "palmitate", "pamoate", "decanoate",
+    "benzoate", "xinafoate", "tromethamine", "monohydrate", "dihydrate", "trihydrate",
+    "hemihydrate", "sesquihydrate", "pentahydrate", "hexahydrate", "heptahydrate", "anhydrous",
+}
+
+
+def bump_index_generation(conn: sqlite3.Connection):
+    """
+    Record a rebuild of the derived indexes, in the caller's transaction.
+    Worker processes compare LabelStore.index_generation() with the
+    generation they loaded to notice it.
+    """
+    conn.execute(_GENERATION_SCHEMA)
+    conn.execute(
+        "INSERT INTO index_generation (id, generation) VALUES (0, 1) "
+        "ON CONFLICT(id) DO UPDATE SET generation = generation + 1"
+    )
+
+
+def normalize_label_name(name: str) -> str:
+    return " ".join(name.strip().lower().split())
+
+
+def base_drug_name(name: str) -> str:
+    """
+    Strip trailing salt/hydrate words ("dexamethasone sodium phosphate" ->
+    "dexamethasone"), keeping names made only of salt words ("potassium
+    chloride").
+    """
+    words = normalize_label_name(name).split()
+    while len(words) > 1 and words[-1] in SALT_WORDS and any(w not in SALT_WORDS for w in words[:-1]):
+        words.pop()
+    return " ".join(words)
+
+
+def label_names(label: Dict) -> List[tuple]:
+    """
+    Return the (name, kind) pairs a label should be findable by.
+    """
+    openfda = label.get("openfda", {})
+    names = []
+    for kind, field in (("brand", "brand_name"), ("generic", "generic_name")):
+        for value in openfda.get(field, []):
+            name = normalize_label_name(value)
+            if name and (name, kind) not in names:
+                names.append((name, kind))
+    return names
+
+
+def slim_label(label: Dict) -> Dict:
+    """
+    Drop every label field the app never reads (package panels, SPL data, etc.).
+    """
+    slim = {field: label[field] for field in VERSION_FIELDS + LABEL_FIELDS if field in label}
+    openfda = label.get("openfda", {})
+    slim["openfda"] = {field: openfda[field] for field in OPENFDA_FIELDS if field in openfda}
+    return slim
+
+
+def label_row(label: Dict) -> Optional[tuple]:
+    """
+    Serialize a label into the (set_id, label_id, version, effective_time, data, names)
+    row written by LabelStore.upsert_rows.
+    """
+    set_id = label.get("set_id")
+    if not set_id:
+        return None
+    return (set_id, label.get("id"), label.get("version"), label.get("effective_time"),
+            json.dumps(label), label_names(label))
+
+
+class LabelStore:
+    """
+    Indexed on-disk (SQLite) store of openFDA drug labels, queried by brand
+    and generic name. Read connections are kept per thread so lookups are safe
+    under Flask's threaded server.
+    """
+
+    def __init__(self, path: str = LABEL_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def is_available(self) -> bool:
+        return os.path.exists(self.path)
+
+    def find_label(self, medication_name: str) -> Optional[Dict]:
+        """
+        Return the most recent label whose brand or generic name matches.
+        """
+        if not self.is_available():
+            return None
+        try:
+            row = self._connect().execute(
+                "SELECT l.data FROM label_names n JOIN labels l ON l.set_id = n.set_id "
+                "WHERE n.name = ? ORDER BY l.effective_time DESC LIMIT 1",
+                (normalize_label_name(medication_name),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Label store error: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def find_label_any(self, names: List[str]) -> Optional[Dict]:
+        """
+        Return the most recent label matching any of the given names.
+        """
+        if not names or not self.is_available():
+            return None
+        placeholders = ",".join("?" * len(names))
+        try:
+            row = self._connect().execute(
+                "SELECT l.data FROM label_names n JOIN labels l ON l.set_id = n.set_id "
+                f"WHERE n.name IN ({placeholders}) ORDER BY l.effective_time DESC LIMIT 1",
+                [normalize_label_name(name) for name in names]
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Label store error: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def get_label(self, set_id: str) -> Optional[Dict]:
+        if not self.is_available():
+            return None
+        row = self._connect().execute("SELECT data FROM labels WHERE set_id = ?", (set_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_labels(self, set_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Return {set_id: label} for the stored labels among set_ids, in one query.
+        """
+        if not set_ids or not self.is_available():
+            return {}
+        placeholders = ",".join("?" * len(set_ids))
+        rows = self._connect().execute(
+            f"SELECT set_id, data FROM labels WHERE set_id IN ({placeholders})", list(set_ids)
+        ).fetchall()
+        return {set_id: json.loads(data) for set_id, data in rows}
+
+    def iter_labels(self) -> Iterable[Dict]:
+        """
+        Stream every stored label without loading the corpus into memory.
+        """
+        if not self.is_available():
+            return
+        for (data,) in self._connect().execute("SELECT data FROM labels"):
+            yield json.loads(data)
+
+    def name_counts(self) -> Dict[str, int]:
+        """
+        Return {brand or generic name: number of labels carrying it}.
+        """
+        if not self.is_available():
+            return {}
+        return dict(self._connect().execute("SELECT name, COUNT(*) FROM label_names GROUP BY name"))
+
+    def index_generation(self) -> int:
+        """
+        Generation of the synonym index and interaction graph on disk.
+        """
+        if not self.is_available():
+            return 0
+        row = self._connect().execute("SELECT generation FROM index_generation WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
+    def count(self) -> int:
+        if not self.is_available():
+            return 0
+        return self._connect().execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+
+    def get_versions(self, set_ids: List[str]) -> Dict[str, tuple]:
+        """
+        Return {set_id: (version, effective_time)} for the stored labels among set_ids.
+        """
+        if not set_ids:
+            return {}
+        placeholders = ",".join("?" * len(set_ids))
+        rows = self._connect().execute(
+            f"SELECT set_id, version, effective_time FROM labels WHERE set_id IN ({placeholders})",
+            list(set_ids)
+        ).fetchall()
+        return {set_id: (version, effective_time) for set_id, version, effective_time in rows}
+
+    def get_names(self, set_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Return {set_id: brand and generic names} for the stored labels among set_ids.
+        """
+        if not set_ids:
+            return {}
+        placeholders = ",".join("?" * len(set_ids))
+        names = {}
+        for set_id, name in self._connect().execute(
+                f"SELECT set_id, name FROM label_names WHERE set_id IN ({placeholders})", list(set_ids)):
+            names.setdefault(set_id, []).append(name)
+        return names
+
+    def upsert_labels(self, labels: Iterable[Dict]) -> int:
+        """
+        Insert or replace labels (keyed by set_id) in a single transaction.
+        """
+        return self.upsert_rows(row for row in map(label_row, labels) if row)
+
+    def upsert_rows(self, rows: Iterable[tuple]) -> int:
+        """
+        Bulk-write rows produced by label_row in a single transaction.
+        """
+        conn = self._connect()
+        written = 0
+        with conn:
+            for set_id, label_id, version, effective_time, data, names in rows:
+                conn.execute(
+                    "INSERT OR REPLACE INTO labels (set_id, label_id, version, effective_time, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (set_id, label_id, version, effective_time, data)
+                )
+                conn.execute("DELETE FROM label_names WHERE set_id = ?", (set_id,))
+                conn.executemany(
+                    "INSERT INTO label_names (name, set_id, kind) VALUES (?, ?, ?)",
+                    [(name, set_id, kind) for name, kind in names]
+                )
+                written += 1
+        return written
+
+    def tune_for_bulk_load(self):
+        """
+        Trade durability for write speed while (re)building the store.
+        """
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
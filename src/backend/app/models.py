@@ -9,7 +9,7 @@ from datetime import datetime
 
 class CheckInteractionsRequest(BaseModel):
     medications: List[constr(strip_whitespace=True, min_length=1)] = Field(
-        ..., description="List of medication names (generic or brand). 2-5 items."
+        ..., description="List of medication names (generic or brand). 2-50 items."
     )
 
     class Config:
@@ -1,28 +1,153 @@
 import os
+import hashlib
 import requests
 from typing import List, Dict, Optional
 import time
-from functools import lru_cache
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import textstat
 from .utils.cost_tracking import log_llm_usage, Timer
+from .utils import http_client
+from .utils.cache import make_cache, flush_local, MISSING
+from .utils.singleflight import SingleFlight
+from .utils.revalidate import cached_load, Lookup
+from .utils.multi_pattern import MultiPatternMatcher
+from .label_store import LabelStore, label_names, normalize_label_name, base_drug_name
+from .interaction_graph import InteractionGraph, MIN_PATTERN_LENGTH
+from .synonym_index import ABBREVIATIONS, SynonymIndex, canonical_drug
+from .explanation_store import ExplanationStore, explanation_key
 
-# In-memory cache for prompt/response caching
-_PROMPT_CACHE = {}
+# In-memory caches for prompt/response caching and label lookups
+_PROMPT_CACHE = make_cache("explanations", maxsize=int(os.getenv("PROMPT_CACHE_SIZE", 1000)))
+# Labels already live in the on-disk label store, so this cache stays per process;
+# sync_indexes drops it when an ingest in any process rebuilds the indexes
+_LABEL_CACHE = make_cache("labels", maxsize=int(os.getenv("LABEL_CACHE_SIZE", 500)), shared=False)
+
+# Unknown names are remembered only briefly, so a drug added upstream shows up soon
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 300))
+
+# Interaction results per unordered pair of canonical drugs, shared by every list containing the pair
+_PAIR_CACHE = make_cache("interaction_pairs", maxsize=int(os.getenv("PAIR_CACHE_SIZE", 20000)))
+
+# Coalesce concurrent identical misses so only one caller does the upstream work
+_LABEL_FLIGHT = SingleFlight("labels")
+_EXPLAIN_FLIGHT = SingleFlight("explanations")
+
+# Bounded pool for fanning out label lookups in interaction checks
+LABEL_LOOKUP_WORKERS = int(os.getenv("LABEL_LOOKUP_WORKERS", 8))
+LABEL_LOOKUP_DEADLINE = float(os.getenv("LABEL_LOOKUP_DEADLINE", 12))  # seconds per request
+_LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=LABEL_LOOKUP_WORKERS, thread_name_prefix="label-lookup")
+
+# Resolve multi-drug checks with one OR'ed OpenFDA search before per-name lookups
+OPENFDA_BATCH_LOOKUPS = os.getenv("OPENFDA_BATCH_LOOKUPS", "true").lower() == "true"
+BATCH_LABELS_PER_NAME = 5  # several labels exist per drug; leave room so each name can match
+OPENFDA_MAX_LIMIT = 1000
+
+
+EXPLANATION_CONTEXT = """
+Medication: {medication}
+Brand Names: {brand_names}
+Drug Class: {drug_class}
+
+Uses: {uses}
+
+Common Dosage: {dosage}
+
+Side Effects: {side_effects}
+
+Warnings: {warnings}
+"""
+
+EXPLANATION_PROMPT = """Based on the following FDA-approved medication information, create a clear, plain-language explanation suitable for a general audience (8th-10th grade reading level).
+
+{context}
+
+Write a concise 3-4 paragraph explanation that covers:
+1. What this medication is and what it treats
+2. How to take it safely
+3. Important side effects and warnings
+
+Use simple language, short sentences, and avoid medical jargon where possible."""
+
+# Part of every stored explanation's key, so editing either template retires old explanations
+PROMPT_VERSION = hashlib.sha256((EXPLANATION_CONTEXT + EXPLANATION_PROMPT).encode()).hexdigest()[:12]
+
+
+def pair_key(drug1: str, drug2: str) -> str:
+    return "|".join(sorted((drug1, drug2)))
+
+
+def _label_missing(label: Optional[Dict]) -> bool:
+    # A lookup that used to resolve and now returns nothing is most likely an upstream failure
+    return label is None
+
+
+def _explanation_failed(entry: Dict) -> bool:
+    return "result" not in entry
 
 class RAGService:
-    def __init__(self):
+    def __init__(self, label_store: LabelStore = None, synonyms: SynonymIndex = None,
+                 interaction_graph: InteractionGraph = None, explanation_store: ExplanationStore = None):
         self.openfda_base = "https://api.fda.gov/drug"
         self.cache_ttl = 3600  # 1 hour cache
+        # The indexes live in memory; share one set per process (see functions.rag)
+        self.label_store = label_store or LabelStore()
+        # Every name resolves through the synonym index before any cache lookup or I/O
+        self.synonyms = synonyms or SynonymIndex(self.label_store)
+        self.interaction_graph = interaction_graph or InteractionGraph(self.label_store, self.synonyms)
+        self.explanation_store = explanation_store or ExplanationStore()
+        # Fall back to the live OpenFDA API when the local label store has no match
+        self.live_fallback = os.getenv("OPENFDA_LIVE_FALLBACK", "true").lower() == "true"
+        # Generation of the on-disk indexes this process has loaded (see sync_indexes)
+        self._index_generation = self.label_store.index_generation()
+        self._index_lock = threading.Lock()
+
+    def canonical_name(self, medication_name: str) -> str:
+        """
+        Canonical drug for a medication name (brand names and salt forms
+        resolve to the base generic), or the normalized name if unknown.
+        """
+        return self.synonyms.resolve(medication_name) or normalize_label_name(medication_name)
+
+    def suggest_names(self, medication_name: str, limit: int = 5) -> List[Dict]:
+        """
+        Known drug names closest in spelling to medication_name, best first.
+        """
+        return self.synonyms.suggest(medication_name, limit)
+
+    def complete_names(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Typeahead completions for a partial medication name.
+        """
+        return self.synonyms.complete(prefix, limit)
 
-    @lru_cache(maxsize=100)
     def _search_openfda_drug_label(self, medication_name: str) -> Optional[Dict]:
-        url = f"{self.openfda_base}/label.json"
-        params = {
-            "search": f'openfda.brand_name:"{medication_name}" OR openfda.generic_name:"{medication_name}"',
-            "limit": 1
-        }
+        # "Not found" is cached briefly, but never replaces a label we resolved before
+        return cached_load(_LABEL_CACHE, _LABEL_FLIGHT, self.canonical_name(medication_name),
+                           lambda: self._load_drug_label(medication_name),
+                           is_error=_label_missing, cache_errors=NEGATIVE_CACHE_TTL).value
+
+    def _find_local_label(self, medication_name: str) -> Optional[Dict]:
+        """
+        Label from the local store. Names the synonym index knows get the most
+        recent label of their canonical drug, whichever name was requested, so
+        results memoized per canonical drug do not depend on the spelling.
+        """
+        canonical = self.synonyms.resolve(medication_name)
+        if canonical:
+            return self.label_store.find_label_any(self.synonyms.names(canonical))
+        return self.label_store.find_label(medication_name)
+
+    def _load_drug_label(self, medication_name: str) -> Optional[Dict]:
+        label = self._find_local_label(medication_name)
+        if not label and self.live_fallback:
+            label = self._fetch_openfda_drug_label(medication_name)
+        return label
+
+    def _fetch_openfda_drug_label(self, medication_name: str) -> Optional[Dict]:
+        url, params = self._label_search_request([medication_name], limit=1)
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             if data.get("results"):
@@ -32,11 +157,49 @@ class RAGService:
             print(f"OpenFDA API error: {e}")
             return None
 
+    def _label_search_request(self, medication_names: List[str], limit: int) -> tuple:
+        url = f"{self.openfda_base}/label.json"
+        params = {
+            "search": " OR ".join(
+                f'openfda.brand_name:"{name}" OR openfda.generic_name:"{name}"' for name in medication_names
+            ),
+            "limit": limit
+        }
+        return url, params
+
+    def _fetch_openfda_drug_labels(self, medication_names: List[str], timeout: float = 10) -> Dict[str, Dict]:
+        """
+        Resolve several medications with a single OpenFDA search (an OR of brand and
+        generic names) and map the returned labels back to the requested names.
+        Names missing from the result had no matching label in this batch.
+        """
+        names = [name.replace('"', "").strip() for name in medication_names]
+        url, params = self._label_search_request(names, limit=min(len(names) * BATCH_LABELS_PER_NAME, OPENFDA_MAX_LIMIT))
+        try:
+            response = http_client.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            results = response.json().get("results", [])
+        except requests.exceptions.RequestException as e:
+            print(f"OpenFDA batch API error: {e}")
+            return {}
+
+        # OpenFDA phrase search matches "warfarin" against "WARFARIN SODIUM", so match on whole words
+        wanted = {normalize_label_name(name): requested for name, requested in zip(names, medication_names)}
+        resolved = {}
+        for label in results:
+            padded = [f" {name} " for name, _ in label_names(label)]
+            for key, requested in wanted.items():
+                if requested not in resolved and any(f" {key} " in name for name in padded):
+                    resolved[requested] = label
+        return resolved
+
     def extract_medication_info(self, medication_name: str) -> Dict:
         """
         Extract comprehensive medication information from OpenFDA.
         """
-        fda_data = self._search_openfda_drug_label(medication_name)
+        return self._label_to_info(self._search_openfda_drug_label(medication_name), medication_name)
+
+    def _label_to_info(self, fda_data: Optional[Dict], medication_name: str) -> Dict:
         if not fda_data:
             return {"found": False, "message": f"No information found for '{medication_name}'"}
 
@@ -79,56 +242,254 @@ class RAGService:
 
         return info
 
-    def _check_fda_interactions(self, medications: List[str]) -> List[Dict]:
-        """
-        Check drug interactions using OpenFDA labels.
-        """
-        interactions = []
-        med_info_map = {med: self._search_openfda_drug_label(med) for med in medications}
-
-        for i in range(len(medications)):
-            for j in range(i + 1, len(medications)):
-                med1, med2 = medications[i], medications[j]
-                fda1, fda2 = med_info_map.get(med1), med_info_map.get(med2)
-
-                found = False
-                for fda_data, other_med in [(fda1, med2), (fda2, med1)]:
-                    if fda_data and fda_data.get("drug_interactions"):
-                        text = fda_data["drug_interactions"][0]
-                        if other_med.lower() in text.lower():
-                            interactions.append({
-                                "drug1": med1,
-                                "drug2": med2,
-                                "severity": "major",
-                                "description": text[:500],
-                                "recommendation": "Consult with a healthcare provider before combining these medications.",
-                                "source": "OpenFDA"
-                            })
-                            found = True
-                            break
-
-                if not found:
-                    interactions.append({
-                        "drug1": med1,
-                        "drug2": med2,
-                        "severity": "unknown",
-                        "description": f"No drug-drug interaction information found for {med1} + {med2} in OpenFDA labels.",
-                        "recommendation": "No specific interaction data available; consult a healthcare provider if concerned.",
-                        "source": "OpenFDA"
-                    })
-
-        return interactions
+    def _lookup_labels(self, medications: List[str]) -> tuple:
+        """
+        Fetch labels for all medications within LABEL_LOOKUP_DEADLINE seconds:
+        local store first, then one batched OpenFDA search, then concurrent
+        per-name lookups for anything the batch could not match.
+        Returns (labels by name, names that timed out).
+        """
+        deadline = time.monotonic() + LABEL_LOOKUP_DEADLINE
+        medications = list(dict.fromkeys(medications))
+        med_info_map = {}
+
+        if OPENFDA_BATCH_LOOKUPS and self.live_fallback:
+            missing = []
+            for med in medications:
+                label = _LABEL_CACHE.get(self.canonical_name(med), MISSING)
+                if label is MISSING:
+                    label = self._find_local_label(med)
+                if label:
+                    med_info_map[med] = label
+                else:
+                    missing.append(med)
+            if len(missing) > 1:
+                batch = self._fetch_openfda_drug_labels(missing, timeout=max(deadline - time.monotonic(), 0.1))
+                for med, label in batch.items():
+                    _LABEL_CACHE.set(self.canonical_name(med), label)
+                med_info_map.update(batch)
+
+        futures = {med: _LOOKUP_EXECUTOR.submit(self._search_openfda_drug_label, med)
+                   for med in medications if med not in med_info_map}
+        wait(futures.values(), timeout=max(deadline - time.monotonic(), 0))
+
+        timed_out = []
+        for med, future in futures.items():
+            if not future.done():
+                future.cancel()
+                timed_out.append(med)
+                med_info_map[med] = None
+            elif future.exception() is not None:
+                print(f"Label lookup error for {med}: {future.exception()}")
+                med_info_map[med] = None
+            else:
+                med_info_map[med] = future.result()
+        return med_info_map, timed_out
+
+    def _label_canonical(self, medication_name: str, label: Optional[Dict]) -> str:
+        return (canonical_drug(label) if label else None) or normalize_label_name(medication_name)
+
+    def _resolve_canonical(self, medications: List[str]) -> tuple:
+        """
+        Canonical drug per medication: from the synonym index when it knows
+        the name, otherwise from the medication's label (looked up here).
+        Returns (canonical by name, names the interaction index can answer,
+        labels looked up, names whose label lookup timed out).
+        """
+        canonical = {med: self.synonyms.resolve(med) for med in medications}
+        in_graph = set()
+        if self.interaction_graph.is_available():
+            in_graph = {med for med, drug in canonical.items() if drug}
+        unresolved = [med for med, drug in canonical.items() if not drug]
+        med_info_map, timed_out = self._lookup_labels(unresolved) if unresolved else ({}, [])
+        for med in unresolved:
+            canonical[med] = self._label_canonical(med, med_info_map.get(med))
+        return canonical, in_graph, med_info_map, timed_out
+
+    def _drug_synonyms(self, medication_name: str, fda_data: Optional[Dict]) -> set:
+        """
+        Names a medication can appear under in another label's interaction
+        section: its label names and their salt-free forms, plus every name the
+        synonym index has for its canonical drug (abbreviations excepted, as in
+        the interaction index). The requested spelling itself is only used for
+        drugs with no canonical name, so pair results do not depend on it.
+        """
+        synonyms = set()
+        if fda_data:
+            openfda = fda_data.get("openfda", {})
+            for field in ("brand_name", "generic_name", "substance_name"):
+                synonyms.update(normalize_label_name(name) for name in openfda.get(field, []))
+        canonical = self.synonyms.resolve(medication_name) or (canonical_drug(fda_data) if fda_data else None)
+        if canonical:
+            synonyms.add(canonical)
+            synonyms.update(name for name in self.synonyms.names(canonical)
+                            if len(name) >= MIN_PATTERN_LENGTH and ABBREVIATIONS.get(name) != canonical)
+        else:
+            synonyms.add(normalize_label_name(medication_name))
+        synonyms.update({base_drug_name(name) for name in synonyms})
+        return synonyms
+
+    def _scan_mentions(self, medications: List[str], med_info_map: Dict) -> Dict[str, set]:
+        """
+        Compile every drug and its synonyms into one multi-pattern matcher and
+        scan each label's interaction section once, so the cost is linear in
+        label text rather than quadratic in the number of drugs.
+        Returns {medication: medications its label mentions}.
+        """
+        patterns = {}
+        for med in medications:
+            for synonym in self._drug_synonyms(med, med_info_map.get(med)):
+                patterns.setdefault(synonym, med)
+        matcher = MultiPatternMatcher(patterns)
+
+        mentions = {}
+        for med in medications:
+            fda_data = med_info_map.get(med)
+            if fda_data and fda_data.get("drug_interactions"):
+                mentions[med] = matcher.find(fda_data["drug_interactions"][0])
+        return mentions
+
+    def _compute_pairs(self, pairs: List[tuple], canonical: Dict[str, str], in_graph: set,
+                       med_info_map: Dict, timed_out: List[str]) -> tuple:
+        """
+        Pair entries for pairs missing from the pair cache: index lookups when
+        both names are in the interaction index, label scans otherwise.
+        Returns (entries by pair, names whose label lookup timed out).
+        """
+        entries = {}
+        scan_pairs = []
+        for med1, med2 in pairs:
+            if med1 in in_graph and med2 in in_graph:
+                entries[(med1, med2)] = self._graph_pair(canonical[med1], canonical[med2])
+            else:
+                scan_pairs.append((med1, med2))
+        if not scan_pairs:
+            return entries, timed_out
+
+        meds = list(dict.fromkeys(med for pair in scan_pairs for med in pair))
+        needed = [med for med in meds if med not in med_info_map and med not in timed_out]
+        if needed:
+            more, more_timed_out = self._lookup_labels(needed)
+            med_info_map = dict(med_info_map, **more)
+            timed_out = timed_out + more_timed_out
+        mentions = self._scan_mentions(meds, med_info_map)
+
+        for med1, med2 in scan_pairs:
+            source = None
+            if med2 in mentions.get(med1, ()):
+                source = med1
+            elif med1 in mentions.get(med2, ()):
+                source = med2
+            if source:
+                entries[(med1, med2)] = {"found": True, "description": med_info_map[source]["drug_interactions"][0][:500]}
+            else:
+                entries[(med1, med2)] = {"found": False, "timed_out": [m for m in (med1, med2) if m in timed_out]}
+        return entries, timed_out
+
+    def _graph_pair(self, drug1: str, drug2: str) -> Dict:
+        pointer = self.interaction_graph.edge(drug1, drug2)
+        passage = self.interaction_graph.passage(pointer) if pointer else None
+        return {"found": True, "description": passage} if passage else {"found": False, "timed_out": []}
+
+    def _pair_interaction(self, med1: str, med2: str, entry: Dict) -> Dict:
+        """
+        Response item for a pair entry, phrased with the requested names.
+        """
+        if entry["found"]:
+            return {
+                "drug1": med1,
+                "drug2": med2,
+                "severity": "major",
+                "description": entry["description"],
+                "recommendation": "Consult with a healthcare provider before combining these medications.",
+                "source": "OpenFDA"
+            }
+        slow = entry.get("timed_out")
+        description = (
+            f"Label lookup for {' and '.join(slow)} timed out; interaction for {med1} + {med2} could not be fully checked."
+            if slow else
+            f"No drug-drug interaction information found for {med1} + {med2} in OpenFDA labels."
+        )
+        return {
+            "drug1": med1,
+            "drug2": med2,
+            "severity": "unknown",
+            "description": description,
+            "recommendation": "No specific interaction data available; consult a healthcare provider if concerned.",
+            "source": "OpenFDA"
+        }
 
     def check_interactions(self, medications: List[str]) -> Dict:
+        """
+        Check every pair of medications. Results are memoized per unordered pair
+        of canonical drugs, so a list that adds one drug to a previously checked
+        list only computes the new pairs.
+        """
         if len(medications) < 2:
             return {"found": False, "message": "At least 2 medications are required."}
-        interactions = self._check_fda_interactions(medications)
+
+        canonical, in_graph, med_info_map, timed_out = self._resolve_canonical(medications)
+        pairs = [(medications[i], medications[j])
+                 for i in range(len(medications)) for j in range(i + 1, len(medications))]
+
+        entries = {}
+        missing = []
+        for med1, med2 in pairs:
+            entry = _PAIR_CACHE.get(pair_key(canonical[med1], canonical[med2]))
+            if entry is None:
+                missing.append((med1, med2))
+            else:
+                entries[(med1, med2)] = entry
+
+        if missing:
+            computed, timed_out = self._compute_pairs(missing, canonical, in_graph, med_info_map, timed_out)
+            for (med1, med2), entry in computed.items():
+                entries[(med1, med2)] = entry
+                # Pairs left incomplete by a timed-out lookup are not memoized
+                if not entry.get("timed_out"):
+                    _PAIR_CACHE.set(pair_key(canonical[med1], canonical[med2]), entry)
+
+        interactions = [self._pair_interaction(med1, med2, entries[(med1, med2)]) for med1, med2 in pairs]
+        return self._interaction_summary(medications, interactions, timed_out)
+
+    def interacting_drugs(self, medication_name: str) -> Dict:
+        """
+        Reverse lookup: every drug the interaction index links to medication_name.
+        """
+        if not self.interaction_graph.is_available():
+            return {"found": False, "message": "Interaction index has not been built."}
+        canonical = self.interaction_graph.canonical(medication_name)
+        if not canonical:
+            return {"found": False, "message": f"No information found for '{medication_name}'"}
+
+        neighbors = self.interaction_graph.neighbors(canonical)
+        # Most pointers share a few labels (this drug's own, for one); parse each once
+        passages = self.interaction_graph.passages([neighbor["pointer"] for neighbor in neighbors])
+        interacts_with = []
+        for neighbor, passage in zip(neighbors, passages):
+            set_id, start, end = neighbor["pointer"]
+            interacts_with.append({
+                "drug": neighbor["drug"],
+                "direction": neighbor["direction"],
+                "passage": passage,
+                "source": {"set_id": set_id, "start": start, "end": end}
+            })
+        return {
+            "found": True,
+            "medication": medication_name,
+            "canonical_name": canonical,
+            "interacts_with": interacts_with,
+            "sources": [{"name": "OpenFDA Drug Labels", "url": "https://open.fda.gov/apis/drug/label/", "type": "FDA"}]
+        }
+
+    def _interaction_summary(self, medications: List[str], interactions: List[Dict], timed_out: List[str]) -> Dict:
         return {
             "found": True,
             "medications": medications,
             "pairs_evaluated": len(medications) * (len(medications) - 1) // 2,
             "total_interactions": len([i for i in interactions if i["severity"] != "unknown"]),
             "interactions": interactions,
+            "timed_out": timed_out,
             "sources": [{"name": "OpenFDA Drug Labels", "url": "https://open.fda.gov/apis/drug/label/", "type": "FDA"}]
         }
 
@@ -137,49 +498,115 @@ class RAGService:
         Generate plain-language explanation using FDA data + LLM.
         Implements prompt caching, model selection/downgrade, and cost tracking.
         """
-        # Check cache first
-        cache_key = f"explain:{medication_name}"
-        cached = _PROMPT_CACHE.get(cache_key)
-        if cached:
-            # Cost tracking for cache hit
-            log_llm_usage(
-                endpoint="/api/explain",
-                model=cached["model"],
-                tokens_input=cached["tokens_input"],
-                tokens_output=cached["tokens_output"],
-                latency_ms=0,
-                cache_hit=True
-            )
-            return cached["result"]
-
-        med_info = self.extract_medication_info(medication_name)
+        cache_key = f"explain:{self.canonical_name(medication_name)}"
+        lookup = cached_load(_PROMPT_CACHE, _EXPLAIN_FLIGHT, cache_key,
+                             lambda: self._generate_explanation(medication_name, gemini_api_key),
+                             is_error=_explanation_failed)
+        return self._explanation_result(lookup)
+
+    def _generate_explanation(self, medication_name: str, gemini_api_key: str) -> Dict:
+        """
+        Return the cache entry for the explanation (from the explanation store
+        or a new Gemini call), or an error dict ({"success": False, ...}).
+        """
+        label = self._search_openfda_drug_label(medication_name)
+        med_info = self._label_to_info(label, medication_name)
         if not med_info.get("found"):
             return {"success": False, "message": med_info.get("message")}
 
-        context = f"""
-Medication: {med_info.get('generic_name') or medication_name}
-Brand Names: {', '.join(med_info.get('brand_names', []))}
-Drug Class: {med_info.get('drug_class') or 'Not specified'}
+        selected_model, url, headers, payload = self._build_explanation_request(med_info, medication_name, gemini_api_key)
+        store_key = explanation_key(label, medication_name, selected_model, PROMPT_VERSION)
+        stored = self._stored_explanation(store_key)
+        if stored:
+            return stored
 
-Uses: {' '.join(med_info.get('uses', ['Not specified']))}
+        try:
+            with Timer() as t:
+                response = http_client.post(url, headers=headers, json=payload, timeout=30)
+                response.raise_for_status()
+                result = response.json()
 
-Common Dosage: {med_info.get('dosage') or 'Consult prescribing information'}
+            return self._save_explanation(store_key, self._finish_explanation(selected_model, result, t.elapsed_ms, med_info))
 
-Side Effects: {' '.join(med_info.get('side_effects', ['Not specified']))}
+        except Exception as e:
+            return {"success": False, "message": f"Failed to generate explanation: {str(e)}"}
 
-Warnings: {' '.join(med_info.get('warnings', ['Not specified']))}
-"""
+    def _explanation_result(self, lookup: Lookup) -> Dict:
+        """
+        Unwrap a cached or freshly generated explanation entry, flagging
+        explanations served past their TTL as stale.
+        """
+        entry = lookup.value
+        if _explanation_failed(entry):
+            return entry
+        if lookup.hit:
+            self._log_cache_hit(entry)
+        if lookup.stale:
+            return dict(entry["result"], stale=True, generated_at=entry["timestamp"])
+        return entry["result"]
+
+    def _log_cache_hit(self, entry: Dict):
+        # Cost tracking for cache hit
+        log_llm_usage(
+            endpoint="/api/explain",
+            model=entry["model"],
+            tokens_input=entry["tokens_input"],
+            tokens_output=entry["tokens_output"],
+            latency_ms=0,
+            cache_hit=True
+        )
+
+    def _stored_explanation(self, store_key: Optional[tuple]) -> Optional[Dict]:
+        """
+        Explanation generated earlier for the same label version, model and prompt.
+        """
+        entry = self.explanation_store.get(store_key) if store_key else None
+        if entry:
+            self._log_cache_hit(entry)
+        return entry
 
-        prompt = f"""Based on the following FDA-approved medication information, create a clear, plain-language explanation suitable for a general audience (8th-10th grade reading level).
+    def _save_explanation(self, store_key: Optional[tuple], entry: Dict) -> Dict:
+        if store_key:
+            self.explanation_store.put(store_key, entry)
+        return entry
 
-{context}
+    def precomputed_explanation(self, medication_name: str) -> Optional[Dict]:
+        """
+        Explanation for the current label from the explanation store only
+        (never calls the LLM); None when none has been generated.
+        """
+        label = self._search_openfda_drug_label(medication_name)
+        med_info = self._label_to_info(label, medication_name)
+        if not med_info.get("found"):
+            return None
+        selected_model = self._build_explanation_request(med_info, medication_name, "")[0]
+        entry = self._stored_explanation(explanation_key(label, medication_name, selected_model, PROMPT_VERSION))
+        return entry["result"] if entry else None
 
-Write a concise 3-4 paragraph explanation that covers:
-1. What this medication is and what it treats
-2. How to take it safely
-3. Important side effects and warnings
+    def stale_explanation(self, medication_name: str) -> Optional[Dict]:
+        """
+        Last good explanation for a medication regardless of its TTL, for use
+        when generating a new one failed outright.
+        """
+        entry, expires_at = _PROMPT_CACHE.get_entry(f"explain:{self.canonical_name(medication_name)}")
+        if entry is MISSING:
+            return None
+        return self._explanation_result(Lookup(entry, expires_at <= time.time(), True))
 
-Use simple language, short sentences, and avoid medical jargon where possible."""
+    def _build_explanation_request(self, med_info: Dict, medication_name: str, gemini_api_key: str) -> tuple:
+        """
+        Build the Gemini request for an explanation: (model, url, headers, payload).
+        """
+        context = EXPLANATION_CONTEXT.format(
+            medication=med_info.get('generic_name') or medication_name,
+            brand_names=', '.join(med_info.get('brand_names', [])),
+            drug_class=med_info.get('drug_class') or 'Not specified',
+            uses=' '.join(med_info.get('uses', ['Not specified'])),
+            dosage=med_info.get('dosage') or 'Consult prescribing information',
+            side_effects=' '.join(med_info.get('side_effects', ['Not specified'])),
+            warnings=' '.join(med_info.get('warnings', ['Not specified']))
+        )
+        prompt = EXPLANATION_PROMPT.format(context=context)
 
         # Model selection / downgrade
         # Use cheaper model for short/simple explanations
@@ -190,50 +617,78 @@ Use simple language, short sentences, and avoid medical jargon where possible.""
         url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent"
         headers = {"Content-Type": "application/json", "x-goog-api-key": gemini_api_key}
         payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "generation_config": {"temperature": 0.3}}
+        return selected_model, url, headers, payload
 
-        try:
-            with Timer() as t:
-                response = requests.post(url, headers=headers, json=payload, timeout=30)
-                response.raise_for_status()
-                result = response.json()
-
-            explanation = result["candidates"][0]["content"]["parts"][0]["text"]
-            usage = result.get("usageMetadata", {})
-            tokens_input = usage.get("promptTokenCount", 0)
-            tokens_output = usage.get("candidatesTokenCount", 0)
-
-            log_llm_usage(
-                endpoint="/api/explain",
-                model=selected_model,
-                tokens_input=tokens_input,
-                tokens_output=tokens_output,
-                latency_ms=t.elapsed_ms,
-                cache_hit=False
-            )
-
-            reading_level = textstat.flesch_kincaid_grade(explanation)
-            final_result = {
-                "success": True,
-                "explanation": explanation,
-                "reading_level": round(reading_level, 1),
-                "reading_level_description": self._get_reading_level_description(reading_level),
-                "sources": med_info.get("sources", []),
-                "medication_info": med_info
-            }
-
-            # Save to cache
-            _PROMPT_CACHE[cache_key] = {
-                "result": final_result,
-                "model": selected_model,
-                "tokens_input": tokens_input,
-                "tokens_output": tokens_output,
-                "timestamp": time.time()
-            }
+    def _finish_explanation(self, selected_model: str, result: Dict, latency_ms: int, med_info: Dict) -> Dict:
+        """
+        Log usage and score readability of a Gemini explanation response;
+        returns the entry to cache.
+        """
+        explanation = result["candidates"][0]["content"]["parts"][0]["text"]
+        usage = result.get("usageMetadata", {})
+        tokens_input = usage.get("promptTokenCount", 0)
+        tokens_output = usage.get("candidatesTokenCount", 0)
+
+        log_llm_usage(
+            endpoint="/api/explain",
+            model=selected_model,
+            tokens_input=tokens_input,
+            tokens_output=tokens_output,
+            latency_ms=latency_ms,
+            cache_hit=False
+        )
+
+        reading_level = textstat.flesch_kincaid_grade(explanation)
+        final_result = {
+            "success": True,
+            "explanation": explanation,
+            "reading_level": round(reading_level, 1),
+            "reading_level_description": self._get_reading_level_description(reading_level),
+            "sources": med_info.get("sources", []),
+            "medication_info": med_info
+        }
 
-            return final_result
+        return {
+            "result": final_result,
+            "model": selected_model,
+            "tokens_input": tokens_input,
+            "tokens_output": tokens_output,
+            "timestamp": time.time()
+        }
 
-        except Exception as e:
-            return {"success": False, "message": f"Failed to generate explanation: {str(e)}"}
+    def sync_indexes(self, force: bool = False) -> bool:
+        """
+        Reload the synonym index and interaction graph when an ingest or rebuild
+        (in any process) has bumped the label store's index generation, and
+        drop everything this process cached in memory, since it may have been
+        computed from the old labels. Returns whether anything was reloaded.
+        force reloads the indexes even when the generation is unchanged.
+        """
+        generation = self.label_store.index_generation()
+        if generation == self._index_generation and not force:
+            return False
+        with self._index_lock:
+            changed = generation != self._index_generation
+            if not changed and not force:
+                return False
+            self.synonyms.reload()
+            self.interaction_graph.reload()
+            self._index_generation = generation
+        if changed:
+            flush_local()
+        return True
+
+    def invalidate(self, medication_names: List[str]) -> int:
+        """
+        Drop cached explanations and label lookups for the given medications.
+        Call sync_indexes first, so names resolve against the new indexes.
+        """
+        names = {normalize_label_name(name) for name in medication_names}
+        drugs = names | {base_drug_name(name) for name in names} | {self.canonical_name(name) for name in names}
+        removed = _PROMPT_CACHE.delete_where(lambda key: key.split(":", 1)[1] in drugs)
+        _LABEL_CACHE.delete_where(lambda key: key in drugs)
+        removed += _PAIR_CACHE.delete_where(lambda key: any(drug in drugs for drug in key.split("|")))
+        return removed
 
     def _get_reading_level_description(self, grade_level: float) -> str:
         if grade_level < 6:
@@ -0,0 +1,230 @@
+# backend/app/synonym_index.py
+
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from .label_store import LabelStore, LABEL_STORE_PATH, base_drug_name, bump_index_generation, normalize_label_name
+from .utils.fuzzy import TrigramIndex
+from .utils.prefix_index import PrefixIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drug_names (
+    name TEXT PRIMARY KEY,
+    canonical TEXT NOT NULL
+);
+"""
+
+# Common clinical abbreviations; added only when the drug exists in the corpus
+ABBREVIATIONS = {
+    "apap": "acetaminophen",
+    "asa": "aspirin",
+    "hctz": "hydrochlorothiazide",
+    "inh": "isoniazid",
+    "kcl": "potassium chloride",
+    "mtx": "methotrexate",
+    "ntg": "nitroglycerin",
+    "nitro": "nitroglycerin",
+    "levo": "levothyroxine",
+    "smx-tmp": "sulfamethoxazole and trimethoprim",
+    "tmp-smx": "sulfamethoxazole and trimethoprim",
+    "epi": "epinephrine",
+    "mso4": "morphine",
+}
+
+
+def canonical_drug(label: Dict) -> Optional[str]:
+    """
+    Canonical identity of the drug a label describes: its base generic name.
+    """
+    generic = label.get("openfda", {}).get("generic_name", [])
+    return base_drug_name(generic[0]) if generic else None
+
+
+def build_synonyms(store: LabelStore) -> Dict[str, str]:
+    """
+    Map every brand, generic and substance name in the corpus (and its
+    salt-stripped form) to a canonical drug; a name shared by several drugs
+    goes to the one most labels agree on.
+    """
+    votes = defaultdict(Counter)
+    for label in store.iter_labels():
+        canonical = canonical_drug(label)
+        if not canonical:
+            continue
+        openfda = label.get("openfda", {})
+        names = {canonical}
+        for field in ("brand_name", "generic_name", "substance_name"):
+            for value in openfda.get(field, []):
+                names.add(normalize_label_name(value))
+                names.add(base_drug_name(value))
+        for name in names:
+            votes[name][canonical] += 1
+    synonyms = {name: counts.most_common(1)[0][0] for name, counts in votes.items()}
+
+    canonicals = set(synonyms.values())
+    for abbreviation, drug in ABBREVIATIONS.items():
+        if drug in canonicals and abbreviation not in synonyms:
+            synonyms[abbreviation] = drug
+    return synonyms
+
+
+def replace_synonyms(conn: sqlite3.Connection, synonyms: Dict[str, str]):
+    """
+    Rewrite the drug_names table in the caller's transaction.
+    """
+    conn.execute(_SCHEMA)
+    conn.execute("DELETE FROM drug_names")
+    conn.executemany("INSERT INTO drug_names (name, canonical) VALUES (?, ?)", synonyms.items())
+
+
+def write_synonyms(store_path: str, synonyms: Dict[str, str]):
+    conn = sqlite3.connect(store_path)
+    with conn:
+        replace_synonyms(conn, synonyms)
+        bump_index_generation(conn)
+    conn.close()
+
+
+def build_synonym_index(store_path: str = LABEL_STORE_PATH) -> Dict:
+    """
+    Rebuild the drug_names table of the label store from the label corpus.
+    """
+    start_time = time.time()
+    store = LabelStore(store_path)
+    synonyms = build_synonyms(store)
+    store.close()
+    write_synonyms(store_path, synonyms)
+    return {
+        "names": len(synonyms),
+        "drugs": len(set(synonyms.values())),
+        "seconds": round(time.time() - start_time, 2),
+    }
+
+
+class SynonymIndex:
+    """
+    In-memory name -> canonical drug map (loaded once from the label store),
+    so brand names, salt forms and abbreviations resolve in O(1) before any
+    cache lookup or upstream call.
+    """
+
+    def __init__(self, store: LabelStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._names = {}
+        self._by_drug = {}
+        self._fuzzy = None
+        self._prefix = None
+
+    def _read_index(self) -> tuple:
+        names = {}
+        if self.store.is_available():
+            conn = sqlite3.connect(self.store.path)
+            try:
+                names = dict(conn.execute("SELECT name, canonical FROM drug_names"))
+            except sqlite3.OperationalError:
+                # Index not built yet
+                names = {}
+            finally:
+                conn.close()
+        by_drug = defaultdict(list)
+        for name, canonical in names.items():
+            by_drug[canonical].append(name)
+        # Built with the map, so no request pays for building the fuzzy or prefix index
+        fuzzy = TrigramIndex(names)
+        counts = self.store.name_counts()
+        most = max(counts.values(), default=0)
+        prefix = PrefixIndex({name: most - count for name, count in counts.items()})
+        return names, dict(by_drug), fuzzy, prefix
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._names, self._by_drug, self._fuzzy, self._prefix = self._read_index()
+            self._loaded = True
+
+    def reload(self):
+        # Build the new index first; requests keep using the old one until the swap
+        index = self._read_index()
+        with self._lock:
+            self._names, self._by_drug, self._fuzzy, self._prefix = index
+            self._loaded = True
+
+    def is_available(self) -> bool:
+        self._load()
+        return bool(self._names)
+
+    def resolve(self, medication_name: str) -> Optional[str]:
+        """
+        Canonical drug for any known name, trying the salt-stripped form too.
+        """
+        self._load()
+        name = normalize_label_name(medication_name)
+        return self._names.get(name) or self._names.get(base_drug_name(name))
+
+    def names(self, canonical: str) -> List[str]:
+        """
+        Every known name of a canonical drug.
+        """
+        self._load()
+        return self._by_drug.get(canonical, [])
+
+    def suggest(self, medication_name: str, limit: int = 5, min_score: float = 0.6) -> List[Dict]:
+        """
+        Ranked spelling corrections for an unknown name, at most one per
+        canonical drug.
+        """
+        self._load()
+        suggestions = []
+        seen = set()
+        for name, score in self._fuzzy.search(normalize_label_name(medication_name), limit * 3, min_score):
+            canonical = self._names.get(name)
+            if canonical and canonical not in seen:
+                seen.add(canonical)
+                suggestions.append({"name": name, "canonical": canonical, "score": score})
+        return suggestions[:limit]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Brand and generic names starting with prefix, names found on more
+        labels first, at most one per canonical drug.
+        """
+        self._load()
+        completions = []
+        seen = set()
+        for name in self._prefix.complete(normalize_label_name(prefix), limit * 3):
+            canonical = self._names.get(name) or self._names.get(base_drug_name(name)) or name
+            if canonical not in seen:
+                seen.add(canonical)
+                completions.append({"name": name, "canonical": canonical})
+        return completions[:limit]
+
+    def __len__(self):
+        self._load()
+        return len(self._names)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Build the drug synonym index from the label store.")
+    parser.add_argument("--db", default=LABEL_STORE_PATH, help="label store path")
+    args = parser.parse_args(argv)
+
+    if not LabelStore(args.db).is_available():
+        print(f"Label store not found at {args.db}; run label_ingest first.")
+        sys.exit(1)
+    print(json.dumps(build_synonym_index(args.db)))
+
+
+if __name__ == "__main__":
+    # python -m backend.app.synonym_index --db labels.db
+    main()
@@ -0,0 +1,314 @@
+# backend/app/usage_analytics.py
+
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from .utils.cost_tracking import LOG_FILE, flush_usage_log
+from .utils.quantiles import LogHistogram
+from .utils.usage_metrics import UsageTotals
+
+# Hourly rollups and per-file read offsets for the usage log
+USAGE_ANALYTICS_PATH = os.getenv("USAGE_ANALYTICS_PATH", "usage_analytics.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    fingerprint TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS hourly_rollups (
+    hour TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    model TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    cache_hits INTEGER NOT NULL,
+    tokens_input INTEGER NOT NULL,
+    tokens_output INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    latency TEXT NOT NULL,
+    PRIMARY KEY (hour, endpoint, model)
+);
+"""
+
+BUCKETS = ("hour", "day", "week", "total")
+GROUP_FIELDS = ("endpoint", "model")
+_RELATIVE_TIME = re.compile(r"^(\d+)([hdw])$")
+
+
+def log_files(log_file: str = LOG_FILE) -> List[str]:
+    """
+    Rotated usage logs (oldest first, plain or gzipped), then the active one.
+    """
+    rotated = [path for path in glob.glob(glob.escape(log_file) + ".*")
+               if path[len(log_file) + 1:][:1].isdigit()]
+    files = sorted(rotated)
+    if os.path.exists(log_file):
+        files.append(log_file)
+    return files
+
+
+def _open_log(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _fingerprint(f) -> Optional[str]:
+    """
+    Identify a log by its first line, which survives rotation and compression;
+    None until that line is complete.
+    """
+    first = f.readline()
+    if not first.endswith(b"\n"):
+        return None
+    return hashlib.sha1(first).hexdigest()[:16]
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # Log timestamps and hour keys are naive UTC
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_time(value: str) -> datetime:
+    """
+    An ISO date/datetime (UTC unless it carries an offset) or a relative time
+    such as "24h", "7d", "2w"; returned as naive UTC.
+    """
+    match = _RELATIVE_TIME.match(value.strip())
+    if match:
+        amount, unit = int(match.group(1)), {"h": "hours", "d": "days", "w": "weeks"}[match.group(2)]
+        return datetime.utcnow() - timedelta(**{unit: amount})
+    return _naive_utc(datetime.fromisoformat(value.strip().rstrip("Z")))
+
+
+def _hour_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H")
+
+
+def _bucket_key(hour: str, bucket: str) -> str:
+    if bucket == "hour":
+        return hour
+    if bucket == "day":
+        return hour[:10]
+    if bucket == "week":
+        day = datetime.strptime(hour[:10], "%Y-%m-%d")
+        return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+    return "total"
+
+
+class _Rollup(UsageTotals):
+    """
+    UsageTotals stored as one hourly_rollups row.
+    """
+
+    __slots__ = ()
+
+    def add_row(self, row: tuple):
+        calls, cache_hits, tokens_input, tokens_output, cost_usd, latency = row
+        self.calls += calls
+        self.cache_hits += cache_hits
+        self.tokens_input += tokens_input
+        self.tokens_output += tokens_output
+        self.cost_usd += cost_usd
+        self.latency.merge(LogHistogram.from_dict(json.loads(latency)))
+
+    def row(self) -> tuple:
+        return (self.calls, self.cache_hits, self.tokens_input, self.tokens_output, self.cost_usd,
+                json.dumps(self.latency.to_dict()))
+
+
+class UsageAnalytics:
+    """
+    Cost and latency analytics over the LLM usage log. Each refresh reads only
+    what was appended since the last one: every log file (active, rotated or
+    gzipped) is tracked by a fingerprint of its first line and a byte offset,
+    and new records are folded into per-hour, per-endpoint, per-model rollups.
+    Queries are answered from the rollups, so time ranges resolve to whole hours.
+    """
+
+    def __init__(self, log_file: str = LOG_FILE, path: str = USAGE_ANALYTICS_PATH):
+        self.log_file = log_file
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def refresh(self) -> Dict:
+        """
+        Fold log lines appended since the last refresh into the hourly rollups.
+        """
+        start = time.time()
+        if self.log_file == LOG_FILE:
+            flush_usage_log(timeout=2)
+        stats = {"files": 0, "lines": 0, "bytes": 0}
+        with self._lock:
+            conn = self._connect()
+            try:
+                # Serializes refreshes across processes, so no line is counted twice
+                conn.execute("BEGIN IMMEDIATE")
+                checkpoints = {fp: (offset, complete) for fp, offset, complete in
+                               conn.execute("SELECT fingerprint, offset, complete FROM checkpoints")}
+                rollups = {}
+                for path in log_files(self.log_file):
+                    self._read_file(conn, path, checkpoints, rollups, stats)
+                self._merge(conn, rollups)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        stats["seconds"] = round(time.time() - start, 3)
+        return stats
+
+    def _read_file(self, conn, path: str, checkpoints: Dict, rollups: Dict, stats: Dict):
+        try:
+            f = _open_log(path)
+        except FileNotFoundError:
+            return  # rotated away since listing; picked up under its new name next time
+        with f:
+            fingerprint = _fingerprint(f)
+            if fingerprint is None:
+                return
+            offset, complete = checkpoints.get(fingerprint, (0, 0))
+            if complete:
+                return
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written
+                offset += len(line)
+                stats["lines"] += 1
+                try:
+                    record = json.loads(line)
+                    key = (record["timestamp"][:13], record.get("endpoint") or "", record.get("model") or "")
+                except (ValueError, KeyError, TypeError):
+                    continue
+                rollup = rollups.get(key)
+                if rollup is None:
+                    rollup = rollups[key] = _Rollup()
+                rollup.add_record(record)
+            stats["bytes"] += offset - checkpoints.get(fingerprint, (0, 0))[0]
+        stats["files"] += 1
+        conn.execute(
+            "INSERT OR REPLACE INTO checkpoints (fingerprint, path, offset, complete) VALUES (?, ?, ?, ?)",
+            (fingerprint, path, offset, int(path != self.log_file))
+        )
+
+    @staticmethod
+    def _merge(conn, rollups: Dict):
+        for key, rollup in rollups.items():
+            row = conn.execute(
+                "SELECT calls, cache_hits, tokens_input, tokens_output, cost_usd, latency FROM hourly_rollups "
+                "WHERE hour = ? AND endpoint = ? AND model = ?", key
+            ).fetchone()
+            if row:
+                rollup.add_row(row)
+            conn.execute(
+                "INSERT OR REPLACE INTO hourly_rollups "
+                "(hour, endpoint, model, calls, cache_hits, tokens_input, tokens_output, cost_usd, latency) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                key + rollup.row()
+            )
+
+    def query(self, start: datetime = None, end: datetime = None, bucket: str = "day",
+              group_by: List[str] = GROUP_FIELDS, endpoint: str = None, model: str = None) -> Dict:
+        """
+        Cost, tokens, cache-hit ratio and latency percentiles from the hour
+        containing start through the hour containing end (UTC), per time bucket
+        and the requested group fields.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {BUCKETS}")
+        unknown = set(group_by) - set(GROUP_FIELDS)
+        if unknown:
+            raise ValueError(f"cannot group by {sorted(unknown)}; use {GROUP_FIELDS}")
+
+        start = _naive_utc(start) if start else None
+        end = _naive_utc(end) if end else None
+        refresh = self.refresh()
+        where, params = [], []
+        if start:
+            where.append("hour >= ?")
+            params.append(_hour_key(start))
+        if end:
+            where.append("hour <= ?")
+            params.append(_hour_key(end))
+        if endpoint:
+            where.append("endpoint = ?")
+            params.append(endpoint)
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        sql = ("SELECT hour, endpoint, model, calls, cache_hits, tokens_input, tokens_output, cost_usd, latency "
+               "FROM hourly_rollups")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        groups, total = {}, _Rollup()
+        conn = self._connect()
+        try:
+            for hour, row_endpoint, row_model, *values in conn.execute(sql, params):
+                fields = {"endpoint": row_endpoint, "model": row_model}
+                key = (_bucket_key(hour, bucket),) + tuple(fields[field] for field in group_by)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = _Rollup()
+                group.add_row(values)
+                total.add_row(values)
+        finally:
+            conn.close()
+
+        rows = []
+        for key in sorted(groups):
+            row = {"bucket": key[0]}
+            row.update(zip(group_by, key[1:]))
+            row.update(groups[key].report())
+            rows.append(row)
+        return {
+            "start": start.isoformat() + "Z" if start else None,
+            "end": end.isoformat() + "Z" if end else None,
+            "bucket": bucket,
+            "group_by": list(group_by),
+            "total": total.report(),
+            "groups": rows,
+            "refresh": refresh,
+        }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Cost and latency report from the LLM usage log.")
+    parser.add_argument("--since", default="7d", help="start: ISO date/time or relative (24h, 7d, 2w)")
+    parser.add_argument("--until", default=None, help="end: ISO date/time or relative (default: now)")
+    parser.add_argument("--bucket", choices=BUCKETS, default="day")
+    parser.add_argument("--group-by", default="endpoint,model", help="comma-separated: endpoint, model")
+    parser.add_argument("--endpoint", help="only this endpoint (e.g. /api/chat)")
+    parser.add_argument("--model", help="only this model")
+    parser.add_argument("--log", default=LOG_FILE, help="active usage log (rotated files are found next to it)")
+    parser.add_argument("--db", default=USAGE_ANALYTICS_PATH, help="rollup and checkpoint store")
+    args = parser.parse_args(argv)
+
+    analytics = UsageAnalytics(args.log, args.db)
+    group_by = [field.strip() for field in args.group_by.split(",") if field.strip()]
+    report = analytics.query(parse_time(args.since), parse_time(args.until) if args.until else None,
+                             args.bucket, group_by, args.endpoint, args.model)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    # python -m backend.app.usage_analytics --since 7d --endpoint /api/chat --bucket total
+    main()
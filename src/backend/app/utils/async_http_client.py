@@ -0,0 +1,44 @@
+# backend/app/utils/async_http_client.py
+
+import asyncio
+import weakref
+
+import httpx
+
+from .http_client import HTTP_POOL_MAXSIZE, HTTP_KEEP_ALIVE
+
+# One pooled keep-alive client per event loop. An ASGI server runs a single loop
+# per worker process, so in practice this is one client per process; httpx
+# connections cannot be shared across loops.
+_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def _new_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_POOL_MAXSIZE * 4,
+        max_keepalive_connections=HTTP_POOL_MAXSIZE if HTTP_KEEP_ALIVE else 0
+    )
+    return httpx.AsyncClient(limits=limits)
+
+
+def get_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None:
+        client = _new_client()
+        _CLIENTS[loop] = client
+    return client
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await get_client().get(url, **kwargs)
+
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    return await get_client().post(url, **kwargs)
+
+
+async def close():
+    client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,362 @@
+# backend/app/utils/cache.py
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+# Default TTL for cached results (seconds)
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 3600))
+
+# "memory" keeps caches per process; "sqlite" shares them across all workers on the host
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache.db")
+
+# Expired entries are kept this long so they can still be served stale:
+# immediately while a background refresh runs, or when the upstream call fails
+CACHE_STALE_SECONDS = int(os.getenv("CACHE_STALE_SECONDS", 86400))
+
+# Sentinel for "not cached", since None is a valid cached value (e.g. label not found)
+MISSING = object()
+
+# Every cache registers itself here so flush/expire/stats cover all of them
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class TTLCache:
+    """
+    Thread-safe bounded LRU cache with a per-entry TTL enforced on read.
+
+    Entries live in an OrderedDict in LRU order (O(1) get/set/evict). Expiry
+    times are also kept in a min-heap, so expire() only touches entries that
+    are actually due instead of scanning every key. An entry past its TTL is a
+    miss for get() but stays readable through get_entry() for stale_ttl more
+    seconds.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = CACHE_TTL_SECONDS,
+                 stale_ttl: float = CACHE_STALE_SECONDS):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._expiry = []           # heap of (expires_at + stale_ttl, key); may hold outdated items
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        with _REGISTRY_LOCK:
+            _REGISTRY[name] = self
+
+    def _lookup(self, key, allow_stale: bool) -> tuple:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING, None
+            now = time.time()
+            expires_at, value = entry
+            if expires_at + self.stale_ttl <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING, None
+            if expires_at <= now and not allow_stale:
+                self.misses += 1
+                return MISSING, None
+            self._data.move_to_end(key)
+            if expires_at > now:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return value, expires_at
+
+    def get(self, key, default=None):
+        value, _ = self._lookup(key, allow_stale=False)
+        return default if value is MISSING else value
+
+    def get_entry(self, key) -> tuple:
+        """
+        Return (value, expires_at) for an entry that is fresh or still within
+        its stale window, otherwise (MISSING, None).
+        """
+        return self._lookup(key, allow_stale=True)
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            heapq.heappush(self._expiry, (expires_at + self.stale_ttl, key))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            if len(self._expiry) > 2 * self.maxsize:
+                self._compact_expiry()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Remove every entry whose key matches predicate; returns the count.
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def expire(self) -> int:
+        """
+        Drop entries whose TTL and stale window have passed; returns the count.
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                dropped_at, key = heapq.heappop(self._expiry)
+                entry = self._data.get(key)
+                if entry is not None and entry[0] + self.stale_ttl == dropped_at:
+                    del self._data[key]
+                    removed += 1
+            self.expirations += removed
+        return removed
+
+    def _compact_expiry(self):
+        self._expiry = [(entry[0] + self.stale_ttl, key) for key, entry in self._data.items()]
+        heapq.heapify(self._expiry)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._expiry.clear()
+
+    def keys(self) -> List:
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteCache:
+    """
+    Cache shared by every worker process on the host, stored in one SQLite
+    file in WAL mode (concurrent readers, one writer, no external service).
+    Same interface as TTLCache; values must be JSON-serializable. Hit/miss
+    counters are per process, guarded by a lock as in TTLCache.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        ns TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        PRIMARY KEY (ns, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry ON cache_entries(ns, expires_at);
+    CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries(ns, accessed_at);
+    """
+
+    # Only rewrite accessed_at when it is this stale, so reads rarely write
+    TOUCH_INTERVAL = 60
+    # Check the size bound every N writes instead of counting on each one
+    EVICT_EVERY = 50
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = CACHE_TTL_SECONDS,
+                 stale_ttl: float = CACHE_STALE_SECONDS, path: str = CACHE_DB_PATH):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.path = path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        with _REGISTRY_LOCK:
+            _REGISTRY[name] = self
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str, amount: int = 1) -> int:
+        with self._stats_lock:
+            value = getattr(self, counter) + amount
+            setattr(self, counter, value)
+            return value
+
+    def _lookup(self, key, allow_stale: bool) -> tuple:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE ns = ? AND key = ?",
+            (self.name, key)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return MISSING, None
+        value, expires_at, accessed_at = row
+        if expires_at + self.stale_ttl <= now:
+            conn.execute("DELETE FROM cache_entries WHERE ns = ? AND key = ? AND expires_at <= ?",
+                         (self.name, key, now - self.stale_ttl))
+            self._count("expirations")
+            self._count("misses")
+            return MISSING, None
+        if expires_at <= now and not allow_stale:
+            self._count("misses")
+            return MISSING, None
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE ns = ? AND key = ?",
+                         (now, self.name, key))
+        self._count("hits" if expires_at > now else "stale_hits")
+        return json.loads(value), expires_at
+
+    def get(self, key, default=None):
+        value, _ = self._lookup(key, allow_stale=False)
+        return default if value is MISSING else value
+
+    def get_entry(self, key) -> tuple:
+        return self._lookup(key, allow_stale=True)
+
+    def set(self, key, value, ttl: float = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (ns, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (self.name, key, json.dumps(value), expires_at, now)
+        )
+        if self._count("_writes") % self.EVICT_EVERY == 0:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        size = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE ns = ?", (self.name,)).fetchone()[0]
+        if size > self.maxsize:
+            cur = conn.execute(
+                "DELETE FROM cache_entries WHERE ns = ? AND key IN "
+                "(SELECT key FROM cache_entries WHERE ns = ? ORDER BY accessed_at LIMIT ?)",
+                (self.name, self.name, size - self.maxsize)
+            )
+            self._count("evictions", cur.rowcount)
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        self._connect().execute("DELETE FROM cache_entries WHERE ns = ? AND key = ?", (self.name, key))
+        return value
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        conn = self._connect()
+        keys = [key for (key,) in conn.execute("SELECT key FROM cache_entries WHERE ns = ?", (self.name,))
+                if predicate(key)]
+        conn.executemany("DELETE FROM cache_entries WHERE ns = ? AND key = ?", [(self.name, key) for key in keys])
+        return len(keys)
+
+    def expire(self) -> int:
+        cur = self._connect().execute("DELETE FROM cache_entries WHERE ns = ? AND expires_at <= ?",
+                                      (self.name, time.time() - self.stale_ttl))
+        self._count("expirations", cur.rowcount)
+        return cur.rowcount
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache_entries WHERE ns = ?", (self.name,))
+
+    def keys(self) -> List:
+        return [key for (key,) in self._connect().execute(
+            "SELECT key FROM cache_entries WHERE ns = ?", (self.name,))]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM cache_entries WHERE ns = ?", (self.name,)).fetchone()[0]
+
+    def stats(self) -> Dict:
+        size = len(self)
+        with self._stats_lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "backend": "sqlite",
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def make_cache(name: str, maxsize: int, ttl: float = CACHE_TTL_SECONDS, shared: bool = True,
+               stale_ttl: float = CACHE_STALE_SECONDS):
+    """
+    Create a cache on the configured backend. Caches created with shared=False
+    always stay in process memory.
+    """
+    if shared and CACHE_BACKEND == "sqlite":
+        return SQLiteCache(name, maxsize=maxsize, ttl=ttl, stale_ttl=stale_ttl)
+    return TTLCache(name, maxsize=maxsize, ttl=ttl, stale_ttl=stale_ttl)
+
+
+def flush_all():
+    for cache in list(_REGISTRY.values()):
+        cache.clear()
+
+
+def flush_local():
+    """
+    Clear the caches held in this process's memory; caches on the shared
+    backend are left alone.
+    """
+    for cache in list(_REGISTRY.values()):
+        if isinstance(cache, TTLCache):
+            cache.clear()
+
+
+def expire_all() -> Dict[str, int]:
+    return {name: cache.expire() for name, cache in list(_REGISTRY.items())}
+
+
+def cache_stats() -> Dict[str, Dict]:
+    return {name: cache.stats() for name, cache in list(_REGISTRY.items())}
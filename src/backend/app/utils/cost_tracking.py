@@ -1,14 +1,36 @@
 # backend/app/utils/cost_tracking.py
 
-import json
+import os
 import time
+import threading
 from datetime import datetime
+from typing import Dict
+
+from .log_writer import BufferedLogWriter
+from .usage_metrics import UsageMetrics
 
 # Gemini Flash estimated pricing (adjust if needed)
 COST_PER_1K_INPUT_TOKENS = 0.00035
 COST_PER_1K_OUTPUT_TOKENS = 0.00070
 
-LOG_FILE = "cost_logs.jsonl"
+LOG_FILE = os.getenv("COST_LOG_FILE", "cost_logs.jsonl")
+
+# Usage records are written by a background thread, in batches, off the request path
+_LOG_WRITER = BufferedLogWriter(
+    LOG_FILE,
+    batch_size=int(os.getenv("COST_LOG_BATCH_SIZE", 100)),
+    flush_interval=float(os.getenv("COST_LOG_FLUSH_SECONDS", 1.0)),
+    max_bytes=int(os.getenv("COST_LOG_MAX_BYTES", 50 * 1024 * 1024)),
+    rotate_seconds=int(os.getenv("COST_LOG_ROTATE_SECONDS", 0)),
+    compress=os.getenv("COST_LOG_COMPRESS", "true").lower() == "true",
+    fsync=os.getenv("COST_LOG_FSYNC", "batch"),
+)
+
+# Rolling 1m/1h/24h aggregates of the same records, kept in memory
+_USAGE_METRICS = UsageMetrics()
+
+# CostMeters active in each thread
+_METERS = threading.local()
 
 
 def estimate_cost(tokens_input: int, tokens_output: int) -> float:
@@ -37,8 +59,54 @@ def log_llm_usage(
         "cache_hit": cache_hit
     }
 
-    with open(LOG_FILE, "a") as f:
-        f.write(json.dumps(record) + "\n")
+    if not cache_hit:
+        for meter in getattr(_METERS, "active", ()):
+            meter.add(record["cost_usd"])
+
+    _USAGE_METRICS.record(record)
+    _LOG_WRITER.write(record)
+
+
+def flush_usage_log(timeout: float = 5.0) -> bool:
+    """
+    Wait until every usage record logged so far is on disk.
+    """
+    return _LOG_WRITER.flush(timeout)
+
+
+def usage_log_stats():
+    return _LOG_WRITER.stats()
+
+
+def usage_metrics() -> Dict:
+    """
+    Rolling 1m/1h/24h usage totals, spend rate and latency percentiles.
+    """
+    return _USAGE_METRICS.snapshot()
+
+
+class CostMeter:
+    """
+    Sums the cost of uncached LLM calls logged by the current thread while
+    active (e.g. to enforce a spend cap on a batch job).
+    """
+
+    def __init__(self):
+        self.cost_usd = 0.0
+        self.calls = 0
+
+    def add(self, cost_usd: float):
+        self.cost_usd += cost_usd
+        self.calls += 1
+
+    def __enter__(self):
+        if not hasattr(_METERS, "active"):
+            _METERS.active = []
+        _METERS.active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _METERS.active.remove(self)
 
 
 class Timer:
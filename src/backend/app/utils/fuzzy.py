@@ -0,0 +1,73 @@
+# backend/app/utils/fuzzy.py
+
+import math
+import heapq
+from itertools import chain
+from array import array
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Iterable, List
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Fuzzy matcher over a fixed set of names. Postings are keyed by
+    (trigram, name length), so a query only touches names of similar length
+    that share a trigram with it; the best candidates by trigram overlap are
+    then ranked by edit similarity.
+    """
+
+    # Candidates re-ranked by edit similarity per query
+    CANDIDATES = 20
+    # Share of the query's trigrams a name must contain to be a candidate
+    MIN_OVERLAP = 0.4
+
+    def __init__(self, names: Iterable[str], max_length_delta: int = 3):
+        self.max_length_delta = max_length_delta
+        self._names = []
+        self._gram_counts = array("H")
+        self._postings = defaultdict(lambda: array("I"))
+        for name in names:
+            grams = trigrams(name)
+            index = len(self._names)
+            self._names.append(name)
+            self._gram_counts.append(min(len(grams), 65535))
+            for gram in grams:
+                self._postings[(gram, len(name))].append(index)
+        self._postings = dict(self._postings)
+
+    def __len__(self):
+        return len(self._names)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.6) -> List[tuple]:
+        """
+        Return up to `limit` (name, score) pairs with score >= min_score, best
+        first; score is difflib's similarity ratio (1.0 = identical).
+        """
+        grams = trigrams(query)
+        lengths = range(max(0, len(query) - self.max_length_delta), len(query) + self.max_length_delta + 1)
+        # Counted in C; the Python-level work is only over names sharing enough trigrams
+        shared = Counter(chain.from_iterable(
+            self._postings.get((gram, length), ()) for length in lengths for gram in grams
+        ))
+        required = max(1, math.ceil(len(grams) * self.MIN_OVERLAP))
+        if not shared:
+            return []
+
+        total = len(grams)
+        counts = self._gram_counts
+        candidates = heapq.nlargest(self.CANDIDATES, ((i, c) for i, c in shared.items() if c >= required),
+                                    key=lambda item: 2 * item[1] / (total + counts[item[0]]))
+        scored = []
+        for index, _ in candidates:
+            name = self._names[index]
+            score = SequenceMatcher(None, query, name).ratio()
+            if score >= min_score:
+                scored.append((name, round(score, 3)))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
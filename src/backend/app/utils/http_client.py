@@ -0,0 +1,86 @@
+# backend/app/utils/http_client.py
+
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pool settings (per upstream host)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 16))
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+HTTP_KEEP_ALIVE = os.getenv("HTTP_KEEP_ALIVE", "true").lower() == "true"
+
+# One keep-alive session per host (api.fda.gov, generativelanguage.googleapis.com, ...)
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=HTTP_POOL_BLOCK
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive" if HTTP_KEEP_ALIVE else "close"
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Return the shared session for the URL's host. The underlying urllib3 pools are
+    thread-safe, so sessions are shared across Flask's worker threads.
+    """
+    host = urlsplit(url).netloc
+    session = _SESSIONS.get(host)
+    if session is None:
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(host)
+            if session is None:
+                session = _new_session()
+                _SESSIONS[host] = session
+    return session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session(url).get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_session(url).post(url, **kwargs)
+
+
+def pool_stats() -> dict:
+    """
+    Per-host request counts split into new vs. reused connections.
+    """
+    stats = {}
+    for host, session in list(_SESSIONS.items()):
+        requests_sent = 0
+        new_connections = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                new_connections += pool.num_connections
+        stats[host] = {
+            "requests": requests_sent,
+            "new_connections": new_connections,
+            "reused_connections": max(requests_sent - new_connections, 0),
+        }
+    return stats
+
+
+def close_all():
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
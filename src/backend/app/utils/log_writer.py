@@ -0,0 +1,262 @@
+# backend/app/utils/log_writer.py
+
+import os
+import gzip
+import json
+import time
+import queue
+import shutil
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict
+
+try:
+    import fcntl  # not available on Windows
+except ImportError:
+    fcntl = None
+
+FSYNC_POLICIES = ("batch", "rotate", "never")
+
+# Tells the writer thread to drain the queue and exit
+_CLOSE = object()
+
+
+class BufferedLogWriter:
+    """
+    Append-only JSONL writer that keeps file I/O off the caller's thread.
+    write() only enqueues; a background thread writes records in batches of up
+    to batch_size, or whatever has arrived after flush_interval seconds, with a
+    single write() per batch so lines from several processes never interleave.
+
+    The file is rotated when it reaches max_bytes or when a new rotate_seconds
+    period begins (0 disables either), renamed to <path>.<UTC timestamp> and
+    gzipped in a separate thread when compress is set. Processes sharing the
+    file rotate under an exclusive lock on <path>.lock and re-check the file
+    under it, so it is rotated once. fsync runs after every batch ("batch"),
+    only before a file is rotated ("rotate") or never. Records still queued at
+    interpreter exit are flushed.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 1.0, max_bytes: int = 0,
+                 rotate_seconds: int = 0, compress: bool = False, fsync: str = "batch", queue_size: int = 10000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+        self.fsync = fsync
+        self.queue_size = queue_size
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._fd = None
+        self._period = None
+        self._compressors = []
+        self._stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0, "compressed": 0, "errors": 0}
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # A forked worker inherits the queue but not the thread, so each process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._fd = None
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def write(self, record: Dict):
+        """
+        Enqueue a record without blocking; it is dropped (and counted) if the
+        queue is full.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._stats["dropped"] += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Block until everything enqueued so far is written.
+        """
+        if self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """
+        Flush what is queued, stop the writer thread and wait for pending
+        compressions.
+        """
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_CLOSE, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        for compressor in list(self._compressors):
+            compressor.join(timeout)
+
+    def stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize() if self._pid == os.getpid() else 0
+        return stats
+
+    def _run(self):
+        batch, waiters = [], []
+        deadline = None
+        closing = False
+        while not closing:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                closing = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (closing or waiters or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch, deadline = [], None
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+        self._close_file(sync=self.fsync != "never")
+
+    def _write_batch(self, batch):
+        data = "".join(json.dumps(record) + "\n" for record in batch).encode()
+        try:
+            if self._rotation_due(time.time()):
+                self._rotate()
+            fd = self._open()
+            os.write(fd, data)
+            if self.fsync == "batch":
+                os.fsync(fd)
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            if self.max_bytes and os.fstat(fd).st_size >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self._stats["errors"] += 1
+            print(f"Log writer error ({self.path}): {e}")
+
+    def _open(self) -> int:
+        # Reopen if another process rotated the file out from under us
+        if self._fd is not None:
+            try:
+                current = os.stat(self.path)
+                opened = os.fstat(self._fd)
+                if (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+                    self._close_file(sync=False)
+            except FileNotFoundError:
+                self._close_file(sync=False)
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._period = self._period_of(time.time())
+        return self._fd
+
+    def _close_file(self, sync: bool):
+        if self._fd is None:
+            return
+        try:
+            if sync:
+                os.fsync(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _period_of(self, now: float):
+        return int(now // self.rotate_seconds) if self.rotate_seconds else None
+
+    def _rotation_due(self, now: float) -> bool:
+        if not self.rotate_seconds:
+            return False
+        if self._fd is None:
+            # Pick up an existing file left by an earlier period (or process)
+            try:
+                return self._period_of(os.stat(self.path).st_mtime) != self._period_of(now)
+            except FileNotFoundError:
+                return False
+        return self._period != self._period_of(now)
+
+    def _rotated_path(self) -> str:
+        # Microsecond UTC stamps keep rotated files in name order = time order
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        candidate, n = f"{self.path}.{stamp}", 1
+        while os.path.exists(candidate) or os.path.exists(candidate + ".gz"):
+            candidate, n = f"{self.path}.{stamp}.{n}", n + 1
+        return candidate
+
+    @contextmanager
+    def _rotation_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _needs_rotation(self, now: float) -> bool:
+        """
+        Whether the file now at path is due for rotation; another process may
+        already have replaced it.
+        """
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if self.max_bytes and current.st_size >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and self._period_of(current.st_mtime) != self._period_of(now)
+
+    def _rotate(self):
+        self._close_file(sync=self.fsync != "never")
+        with self._rotation_lock():
+            if not self._needs_rotation(time.time()):
+                return
+            rotated = self._rotated_path()
+            os.rename(self.path, rotated)
+        self._stats["rotations"] += 1
+        if self.compress:
+            # Off the writer thread, so draining the queue never waits for gzip
+            compressor = threading.Thread(target=self._compress, args=(rotated,), name="log-compress")
+            self._compressors = [t for t in self._compressors if t.is_alive()] + [compressor]
+            compressor.start()
+
+    def _compress(self, rotated: str):
+        # Written under a hidden name, so readers never see a partial .gz
+        partial = os.path.join(os.path.dirname(rotated), "." + os.path.basename(rotated) + ".gz")
+        try:
+            with open(rotated, "rb") as src, gzip.open(partial, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.rename(partial, rotated + ".gz")
+            os.remove(rotated)
+            self._stats["compressed"] += 1
+        except OSError as e:
+            self._stats["errors"] += 1
+            print(f"Log writer error compressing {rotated}: {e}")
@@ -0,0 +1,84 @@
+# backend/app/utils/multi_pattern.py
+
+from collections import deque
+from typing import Dict, Iterable, Set
+
+
+class MultiPatternMatcher:
+    """
+    Aho-Corasick automaton over case-insensitive, whole-word patterns.
+    Each pattern maps to a key (e.g. every synonym of a drug maps to the drug),
+    and find() reports the keys mentioned in a text in a single pass.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, key in patterns.items():
+            pattern = pattern.strip().lower()
+            if pattern:
+                self._add(pattern, key)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, key: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), key))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _iter_matches(self, text: str):
+        """
+        Yield (key, start, end) for every whole-word match in lowercased text.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, key in out[state]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    yield key, start, end
+
+    def find(self, text: str, keys: Iterable[str] = None) -> Set[str]:
+        """
+        Return the keys whose patterns occur in text as whole words.
+        Stops early once every key in `keys` (if given) has been seen.
+        """
+        wanted = set(keys) if keys is not None else None
+        found = set()
+        for key, _, _ in self._iter_matches(text.lower()):
+            found.add(key)
+            if wanted is not None and wanted <= found:
+                break
+        return found
+
+    def find_first(self, text: str) -> Dict[str, tuple]:
+        """
+        Return {key: (start, end)} of the first whole-word occurrence of each key.
+        """
+        first = {}
+        for key, start, end in self._iter_matches(text.lower()):
+            first.setdefault(key, (start, end))
+        return first
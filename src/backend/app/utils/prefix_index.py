@@ -0,0 +1,38 @@
+# backend/app/utils/prefix_index.py
+
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, List
+
+
+class PrefixIndex:
+    """
+    Prefix completion over a fixed set of names: one sorted list searched with
+    bisect, so all completions of a prefix form one contiguous slice. Each name
+    carries a precomputed rank (lower is better) used to order completions.
+    """
+
+    def __init__(self, ranked_names: Dict[str, int]):
+        self._names = sorted(ranked_names)
+        self._ranks = array("I", (ranked_names[name] for name in self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def _range(self, prefix: str) -> range:
+        lo = bisect_left(self._names, prefix)
+        hi = bisect_left(self._names, prefix + "\U0010ffff", lo)
+        return range(lo, hi)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Up to `limit` names starting with prefix, best ranked first (ties by
+        length, then alphabetically).
+        """
+        if not prefix:
+            return []
+        names, ranks = self._names, self._ranks
+        best = heapq.nsmallest(limit, self._range(prefix),
+                               key=lambda i: (ranks[i], len(names[i]), names[i]))
+        return [names[i] for i in best]
@@ -0,0 +1,127 @@
+# backend/app/utils/query_log.py
+
+import os
+import sys
+import time
+import uuid
+import weakref
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+
+class QueryLogRecord:
+    """
+    One logged query. Medication and severity strings are interned, so the
+    names repeated across thousands of records are stored once.
+    """
+
+    __slots__ = ("token", "seq", "medications", "interactions_found", "severity_level", "timestamp")
+
+    def __init__(self, token: str, seq: int, medications: List[str], interactions_found: int,
+                 severity_level: str, timestamp):
+        # Shared by every record of one log; keeps ids from different processes apart
+        self.token = token
+        self.seq = seq
+        self.medications = tuple(sys.intern(str(m)) for m in medications)
+        self.interactions_found = interactions_found
+        self.severity_level = sys.intern(severity_level)
+        # Epoch seconds unless the caller supplied its own timestamp
+        self.timestamp = timestamp
+
+    @property
+    def log_id(self) -> str:
+        return f"log_{self.token}_{self.seq:06x}"
+
+    def to_dict(self) -> Dict:
+        timestamp = self.timestamp
+        if isinstance(timestamp, float):
+            timestamp = datetime.utcfromtimestamp(timestamp).isoformat() + "Z"
+        elif isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        return {
+            "log_id": self.log_id,
+            "medications": list(self.medications),
+            "interactions_found": self.interactions_found,
+            "severity_level": self.severity_level,
+            "timestamp": timestamp,
+        }
+
+
+# Workers forked from a preloaded app must not share the parent's tokens
+_LOGS = weakref.WeakSet()
+
+
+def _renew_tokens():
+    for log in list(_LOGS):
+        log._new_token()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_renew_tokens)
+
+
+class QueryLog:
+    """
+    Fixed-capacity ring buffer of query records; once full, each new record
+    overwrites the oldest. Records carry an increasing sequence number that
+    doubles as the pagination cursor. Log ids prefix it with a random token
+    per log, so ids from different worker processes do not collide.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._new_token()
+        self._ring: List[Optional[QueryLogRecord]] = [None] * self.capacity
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        _LOGS.add(self)
+
+    def _new_token(self):
+        self.token = uuid.uuid4().hex[:8]
+
+    def append(self, medications: List[str], interactions_found: int, severity_level: str = "none",
+               timestamp=None) -> QueryLogRecord:
+        with self._lock:
+            record = QueryLogRecord(self.token, self._next_seq, medications, interactions_found,
+                                    severity_level, time.time() if timestamp is None else timestamp)
+            self._ring[record.seq % self.capacity] = record
+            self._next_seq += 1
+        return record
+
+    def _oldest_seq(self) -> int:
+        return max(1, self._next_seq - self.capacity)
+
+    def page(self, cursor: int = 0, limit: int = 100) -> Dict:
+        """
+        Up to `limit` records after `cursor` (a seq), oldest first. Records
+        already overwritten are skipped and counted.
+        """
+        with self._lock:
+            first = max(cursor + 1, self._oldest_seq())
+            last = min(first + max(0, limit), self._next_seq)
+            records = [self._ring[seq % self.capacity] for seq in range(first, last)]
+            has_more = last < self._next_seq
+        return {
+            "records": records,
+            "next_cursor": last - 1 if records else cursor,
+            "has_more": has_more,
+            "skipped": max(0, first - cursor - 1),
+        }
+
+    def __iter__(self) -> Iterator[QueryLogRecord]:
+        """
+        Every retained record, oldest first, read one page at a time so
+        writers are never blocked for the whole traversal.
+        """
+        cursor = 0
+        while True:
+            page = self.page(cursor, 500)
+            yield from page["records"]
+            if not page["has_more"]:
+                return
+            cursor = page["next_cursor"]
+
+    def __len__(self):
+        with self._lock:
+            return self._next_seq - self._oldest_seq()
@@ -0,0 +1,173 @@
+# backend/app/utils/revalidate.py
+
+import asyncio
+import os
+import time
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from .cache import MISSING, SQLiteCache
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+# Entries up to this many seconds past their TTL are served immediately while a
+# background refresh runs; older ones (up to the cache's stale_ttl) are only
+# served when reloading them fails
+CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", 3600))
+CACHE_REFRESH_WORKERS = int(os.getenv("CACHE_REFRESH_WORKERS", 4))
+
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_REFRESHING = set()
+_REFRESHING_LOCK = threading.Lock()
+
+# value: what to return; stale: served past its TTL; hit: came from the cache
+Lookup = namedtuple("Lookup", ["value", "stale", "hit"])
+
+
+def _failed(value, is_error: Optional[Callable]) -> bool:
+    return is_error is not None and is_error(value)
+
+
+def _stale_window(value, expires_at: Optional[float], is_error: Optional[Callable]) -> str:
+    """
+    Classify a cache entry: "missing", "fresh", "revalidate" (serve now, refresh
+    in the background) or "if_error" (serve only if reloading fails). Cached
+    failures are never served stale.
+    """
+    if value is MISSING:
+        return "missing"
+    overdue = time.time() - expires_at
+    if overdue < 0:
+        return "fresh"
+    if _failed(value, is_error):
+        return "missing"
+    if overdue <= CACHE_STALE_WHILE_REVALIDATE:
+        return "revalidate"
+    return "if_error"
+
+
+def _store(cache, key, result, is_error: Optional[Callable], cache_errors, has_stale: bool):
+    # A failed reload never overwrites a good stale entry
+    if not _failed(result, is_error):
+        cache.set(key, result)
+    elif cache_errors and not has_stale:
+        # cache_errors may be a TTL in seconds for negative entries
+        cache.set(key, result, ttl=None if cache_errors is True else cache_errors)
+    return result
+
+
+def _claim_refresh(cache, key) -> bool:
+    with _REFRESHING_LOCK:
+        if (cache.name, key) in _REFRESHING:
+            return False
+        _REFRESHING.add((cache.name, key))
+        return True
+
+
+def _release_refresh(cache, key):
+    with _REFRESHING_LOCK:
+        _REFRESHING.discard((cache.name, key))
+
+
+def cached_load(cache, flight: SingleFlight, key, load: Callable, is_error: Callable = None,
+                cache_errors=False) -> Lookup:
+    """
+    Read-through cache lookup with stale-while-revalidate and stale-if-error.
+    A fresh entry is returned as is. An entry within the revalidate window is
+    returned immediately and refreshed in the background. Otherwise load() runs
+    (coalesced per key); if it raises or is_error(result) holds, an older stale
+    entry the cache still keeps is returned instead. Failed results are only
+    cached when cache_errors is set (True, or a shorter TTL in seconds) and
+    there is no stale entry.
+    """
+    value, expires_at = cache.get_entry(key)
+    window = _stale_window(value, expires_at, is_error)
+    if window == "fresh":
+        return Lookup(value, False, True)
+    if window == "revalidate":
+        if _claim_refresh(cache, key):
+            _REFRESH_EXECUTOR.submit(_refresh, cache, flight, key, load, is_error)
+        return Lookup(value, True, True)
+
+    has_stale = window == "if_error"
+    try:
+        result = flight.do(key, _store_load, cache, key, load, is_error, cache_errors, has_stale)
+    except Exception as e:
+        if not has_stale:
+            raise
+        print(f"Serving stale {cache.name} entry after error: {e}")
+        return Lookup(value, True, True)
+    if has_stale and _failed(result, is_error):
+        return Lookup(value, True, True)
+    return Lookup(result, False, False)
+
+
+def _store_load(cache, key, load: Callable, is_error, cache_errors, has_stale: bool):
+    return _store(cache, key, load(), is_error, cache_errors, has_stale)
+
+
+def _refresh(cache, flight: SingleFlight, key, load: Callable, is_error):
+    try:
+        flight.do(key, _store_load, cache, key, load, is_error, False, True)
+    except Exception as e:
+        print(f"Background refresh of {cache.name} entry failed: {e}")
+    finally:
+        _release_refresh(cache, key)
+
+
+# Background refreshes started on an event loop; kept so they are not garbage collected
+_ASYNC_REFRESHES = set()
+
+
+async def _cache_call(cache, method: str, *args):
+    # The sqlite backend does disk I/O, which must not run on the event loop
+    if isinstance(cache, SQLiteCache):
+        return await asyncio.to_thread(getattr(cache, method), *args)
+    return getattr(cache, method)(*args)
+
+
+async def cached_load_async(cache, flight: AsyncSingleFlight, key, load: Callable, is_error: Callable = None,
+                            cache_errors=False) -> Lookup:
+    """
+    cached_load for coroutines: load is an async callable, concurrent misses
+    are coalesced on the event loop and background refreshes run as tasks.
+    """
+    value, expires_at = await _cache_call(cache, "get_entry", key)
+    window = _stale_window(value, expires_at, is_error)
+    if window == "fresh":
+        return Lookup(value, False, True)
+    if window == "revalidate":
+        if _claim_refresh(cache, key):
+            task = asyncio.get_running_loop().create_task(_refresh_async(cache, flight, key, load, is_error))
+            _ASYNC_REFRESHES.add(task)
+            task.add_done_callback(_ASYNC_REFRESHES.discard)
+        return Lookup(value, True, True)
+
+    has_stale = window == "if_error"
+    try:
+        result = await flight.do(key, _store_load_async, cache, key, load, is_error, cache_errors, has_stale)
+    except Exception as e:
+        if not has_stale:
+            raise
+        print(f"Serving stale {cache.name} entry after error: {e}")
+        return Lookup(value, True, True)
+    if has_stale and _failed(result, is_error):
+        return Lookup(value, True, True)
+    return Lookup(result, False, False)
+
+
+async def _store_load_async(cache, key, load: Callable, is_error, cache_errors, has_stale: bool):
+    result = await load()
+    if isinstance(cache, SQLiteCache):
+        return await asyncio.to_thread(_store, cache, key, result, is_error, cache_errors, has_stale)
+    return _store(cache, key, result, is_error, cache_errors, has_stale)
+
+
+async def _refresh_async(cache, flight: AsyncSingleFlight, key, load: Callable, is_error):
+    try:
+        await flight.do(key, _store_load_async, cache, key, load, is_error, False, True)
+    except Exception as e:
+        print(f"Background refresh of {cache.name} entry failed: {e}")
+    finally:
+        _release_refresh(cache, key)
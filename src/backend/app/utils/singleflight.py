@@ -0,0 +1,111 @@
+# backend/app/utils/singleflight.py
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+# Every group registers itself here so stats cover all of them
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Request coalescing for concurrent identical cache misses: the first caller
+    for a key runs the upstream work, later callers for the same key wait for
+    its result instead of repeating it. Waiters block on a thread-safe
+    concurrent.futures.Future.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        with _REGISTRY_LOCK:
+            _REGISTRY[name] = self
+
+    def _join(self, key) -> tuple:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.executed += 1
+            return future, True
+
+    def _finish(self, key, future: Future, result=None, error: BaseException = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn: Callable, *args, **kwargs):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop: waiters await the leader's
+    asyncio future instead of blocking a thread. Everything runs on the loop's
+    thread, so no lock is needed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+        with _REGISTRY_LOCK:
+            _REGISTRY[name] = self
+
+    async def do(self, key, fn: Callable, *args, **kwargs):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # A cancelled waiter must not cancel the shared call
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._calls.pop(key, None)
+            future.cancel()
+            raise
+        except BaseException as e:
+            self._calls.pop(key, None)
+            future.set_exception(e)
+            # The leader re-raises; waiters, if any, see the error through the future
+            future.exception()
+            raise
+        self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict:
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+def flight_stats() -> Dict[str, Dict]:
+    return {name: flight.stats() for name, flight in list(_REGISTRY.items())}
@@ -0,0 +1,130 @@
+# backend/app/utils/usage_metrics.py
+
+import time
+import threading
+from typing import Dict
+
+from .quantiles import LogHistogram
+
+# name -> (window seconds, slot seconds); a window slides forward one slot at a time
+WINDOWS = {
+    "1m": (60, 1),
+    "1h": (3600, 60),
+    "24h": (86400, 600),
+}
+
+
+class UsageTotals:
+    """
+    Call, cache-hit, token and cost totals plus a latency sketch for a set of
+    LLM usage records. Latency counts uncached calls only.
+    """
+
+    __slots__ = ("calls", "cache_hits", "tokens_input", "tokens_output", "cost_usd", "latency")
+
+    def __init__(self):
+        self.calls = self.cache_hits = self.tokens_input = self.tokens_output = 0
+        self.cost_usd = 0.0
+        self.latency = LogHistogram()
+
+    def add_record(self, record: Dict):
+        self.calls += 1
+        self.tokens_input += record.get("tokens_input") or 0
+        self.tokens_output += record.get("tokens_output") or 0
+        self.cost_usd += record.get("cost_usd") or 0.0
+        if record.get("cache_hit"):
+            self.cache_hits += 1
+        else:
+            # Cache hits cost no LLM time; only upstream calls count towards latency
+            self.latency.add(record.get("latency_ms") or 0)
+
+    def merge(self, other: "UsageTotals"):
+        self.calls += other.calls
+        self.cache_hits += other.cache_hits
+        self.tokens_input += other.tokens_input
+        self.tokens_output += other.tokens_output
+        self.cost_usd += other.cost_usd
+        self.latency.merge(other.latency)
+
+    def report(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "cache_hit_ratio": round(self.cache_hits / self.calls, 4) if self.calls else None,
+            "tokens_input": self.tokens_input,
+            "tokens_output": self.tokens_output,
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_ms": self.latency.summary(),
+        }
+
+
+class RollingUsage:
+    """
+    Usage totals over a sliding time window, kept as a fixed ring of time
+    slots per (endpoint, model), so memory stays constant however many calls
+    are recorded. A slot is reset when the ring comes back around to it.
+    """
+
+    def __init__(self, window_seconds: int, slot_seconds: int):
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self.slots = window_seconds // slot_seconds
+        self._rings = {}
+
+    def add(self, key: tuple, record: Dict, now: float):
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = [[None, None] for _ in range(self.slots)]
+        epoch = int(now // self.slot_seconds)
+        slot = ring[epoch % self.slots]
+        if slot[0] != epoch:
+            slot[0], slot[1] = epoch, UsageTotals()
+        slot[1].add_record(record)
+
+    def totals(self, now: float) -> Dict[tuple, UsageTotals]:
+        oldest = int(now // self.slot_seconds) - self.slots
+        totals = {}
+        for key, ring in self._rings.items():
+            merged = UsageTotals()
+            for epoch, slot_totals in ring:
+                if epoch is not None and epoch > oldest:
+                    merged.merge(slot_totals)
+            if merged.calls:
+                totals[key] = merged
+        return totals
+
+
+class UsageMetrics:
+    """
+    Rolling 1m/1h/24h LLM usage per endpoint and model, fed by every logged
+    call, for real-time spend rate and latency without reading the log file.
+    """
+
+    def __init__(self, windows: Dict[str, tuple] = None):
+        self._lock = threading.Lock()
+        self._windows = {name: RollingUsage(*spec) for name, spec in (windows or WINDOWS).items()}
+
+    def record(self, record: Dict, now: float = None):
+        now = time.time() if now is None else now
+        key = (record.get("endpoint") or "", record.get("model") or "")
+        with self._lock:
+            for window in self._windows.values():
+                window.add(key, record, now)
+
+    def snapshot(self, now: float = None) -> Dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            windows = {name: (window.window_seconds, window.totals(now)) for name, window in self._windows.items()}
+
+        snapshot = {}
+        for name, (seconds, totals) in windows.items():
+            overall = UsageTotals()
+            groups = []
+            for (endpoint, model), group in sorted(totals.items()):
+                overall.merge(group)
+                groups.append(dict(group.report(), endpoint=endpoint, model=model))
+            report = overall.report()
+            report["cost_usd_per_hour"] = round(overall.cost_usd * 3600 / seconds, 6)
+            report["by_endpoint_model"] = groups
+            snapshot[name] = report
+        return snapshot
@@ -0,0 +1,69 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# Module-level settings are read at import time: keep test runs offline and out of the working tree
+_TMP = tempfile.mkdtemp(prefix="fusion-core-tests-")
+os.environ.update(
+    OPENFDA_LIVE_FALLBACK="false",
+    WARM_ON_STARTUP="false",
+    CACHE_BACKEND="memory",
+    LABEL_STORE_PATH=os.path.join(_TMP, "labels.db"),
+    EXPLANATION_STORE_PATH=os.path.join(_TMP, "explanations.db"),
+    CACHE_DB_PATH=os.path.join(_TMP, "cache.db"),
+    COST_LOG_FILE=os.path.join(_TMP, "cost_logs.jsonl"),
+    USAGE_ANALYTICS_PATH=os.path.join(_TMP, "usage_analytics.db"),
+)
+
+
+def make_label(set_id: str, generic: str, brands=(), interactions: str = None, effective_time: str = "20240101"):
+    """
+    Minimal openFDA label with the fields the app reads.
+    """
+    label = {
+        "set_id": set_id,
+        "id": f"{set_id}-v1",
+        "version": "1",
+        "effective_time": effective_time,
+        "openfda": {"generic_name": [generic.upper()], "brand_name": [b.upper() for b in brands]},
+    }
+    if interactions:
+        label["drug_interactions"] = [interactions]
+    return label
+
+
+@pytest.fixture(name="make_label")
+def make_label_fixture():
+    return make_label
+
+
+@pytest.fixture
+def label_store(tmp_path):
+    """
+    Build a label store from a list of labels and return its path.
+    """
+    from backend.app.label_store import LabelStore
+
+    def build(labels, name: str = "labels.db") -> str:
+        path = str(tmp_path / name)
+        store = LabelStore(path)
+        store.upsert_labels(labels)
+        store.close()
+        return path
+
+    return build
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    from backend.app.utils import cache
+    cache.flush_all()
+    yield
+    cache.flush_all()
@@ -0,0 +1,172 @@
+# tests/test_asgi.py
+
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from backend.app import api, asgi, rag_service
+from backend.app.async_rag_service import AsyncRAGService
+from backend.app.explanation_store import ExplanationStore
+from backend.app.label_store import LabelStore
+from backend.app.rag_service import RAGService
+from backend.app.synonym_index import build_synonym_index
+from backend.app.utils import async_http_client
+
+
+def _gemini_text(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 20}}
+
+
+def _response(data: dict) -> httpx.Response:
+    return httpx.Response(200, json=data, request=httpx.Request("POST", "https://gemini.test"))
+
+
+async def _call(method: str, path: str, body: dict = None, client: str = "10.0.0.1") -> tuple:
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": method, "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "headers": [(b"content-type", b"application/json")], "http_version": "1.1", "scheme": "http",
+             "root_path": "", "server": ("testserver", 80), "client": (client, 1234)}
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app(scope, receive, send)
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return start["status"], json.loads(body) if body else None
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """
+    Replace the async client's POST; set .reply to a coroutine function.
+    """
+    calls = []
+
+    class Fake:
+        delay = 0
+        reply = None
+
+    async def post(url, **kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(Fake.delay)
+        return await Fake.reply(len(calls))
+
+    monkeypatch.setattr(async_http_client, "post", post)
+    monkeypatch.setattr(api, "CHAT_RETRY_DELAY", 0)
+    Fake.calls = calls
+    return Fake
+
+
+def test_chat_retries_without_blocking_and_returns_text(gemini):
+    async def reply(attempt):
+        if attempt == 1:
+            raise httpx.ConnectTimeout("slow upstream")
+        return _response(_gemini_text("Take it with food."))
+
+    gemini.reply = reply
+    status, data = asyncio.run(_call("POST", "/api/chat", {"prompt": "hi"}, client="10.0.1.1"))
+    assert status == 200
+    assert data == {"status": "success", "via": "gemini:text", "text": "Take it with food."}
+    assert len(gemini.calls) == 2
+
+
+def test_chat_falls_back_after_the_last_retry(gemini):
+    async def reply(attempt):
+        raise httpx.ConnectError("down")
+
+    gemini.reply = reply
+    status, data = asyncio.run(_call("POST", "/api/chat", {"prompt": "hi"}, client="10.0.1.2"))
+    assert status == 200
+    assert data == api.FALLBACK_RESPONSES["chat"]
+    assert len(gemini.calls) == api.CHAT_MAX_RETRIES + 1
+
+
+def test_slow_chats_run_concurrently_without_a_thread_each(gemini):
+    async def reply(attempt):
+        return _response(_gemini_text("ok"))
+
+    gemini.reply = reply
+    gemini.delay = 0.5
+    threads_before = threading.active_count()
+
+    async def run():
+        # Distinct clients so the per-address rate limit does not apply
+        return await asyncio.gather(*[_call("POST", "/api/chat", {"prompt": "hi"}, client=f"10.1.{i // 250}.{i % 250}")
+                                      for i in range(200)])
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+    assert time.monotonic() - started < 3
+    assert all(status == 200 for status, _ in results)
+    assert threading.active_count() <= threads_before + 1
+
+
+def test_chat_is_rate_limited_per_client(gemini):
+    async def reply(attempt):
+        return _response(_gemini_text("ok"))
+
+    gemini.reply = reply
+
+    async def run():
+        return [await _call("POST", "/api/chat", {"prompt": "hi"}, client="10.2.0.1") for _ in range(16)]
+
+    statuses = [status for status, _ in asyncio.run(run())]
+    assert statuses == [200] * 15 + [429]
+
+
+def test_chat_tool_call_without_a_medication_name_returns_the_error(gemini):
+    async def reply(attempt):
+        return _response({"candidates": [{"content": {"parts": [
+            {"functionCall": {"name": "generate_explanation", "args": {}}}]}}]})
+
+    gemini.reply = reply
+    status, data = asyncio.run(_call("POST", "/api/chat", {"prompt": "explain it"}, client="10.3.0.2"))
+    assert status == 200
+    assert data["result"] == {"status": "error", "message": "medication_name is required"}
+
+
+def test_chat_rejects_a_missing_prompt():
+    status, data = asyncio.run(_call("POST", "/api/chat", {}, client="10.3.0.1"))
+    assert status == 400
+    assert data["message"] == "Missing prompt"
+
+
+def test_other_routes_are_served_by_flask():
+    status, data = asyncio.run(_call("GET", "/api/medications/autocomplete?q=war", client="10.4.0.1"))
+    assert status == 200
+    assert data["data"]["query"] == "war"
+
+
+def test_concurrent_explanations_share_one_gemini_call(tmp_path, monkeypatch, label_store, make_label, gemini):
+    # Readability scoring needs a downloaded pronunciation corpus
+    monkeypatch.setattr(rag_service.textstat, "flesch_kincaid_grade", lambda text: 6.0)
+    path = label_store([make_label("w1", "warfarin", ["Coumadin"])])
+    build_synonym_index(path)
+    rag = RAGService(label_store=LabelStore(path), explanation_store=ExplanationStore(str(tmp_path / "explanations.db")))
+    service = AsyncRAGService(rag)
+
+    async def reply(attempt):
+        return _response(_gemini_text("Warfarin thins your blood. Take it at the same time each day."))
+
+    gemini.reply = reply
+    gemini.delay = 0.2
+
+    async def run():
+        return await asyncio.gather(*[service.explain(name, "key") for name in ("warfarin", "Coumadin") * 5])
+
+    results = asyncio.run(run())
+    assert len(gemini.calls) == 1
+    assert all(result["success"] and result["explanation"].startswith("Warfarin") for result in results)
+    # The sync service reads the same cache entry
+    assert rag.generate_plain_language_explanation("coumadin", "key")["explanation"] == results[0]["explanation"]
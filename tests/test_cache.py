@@ -0,0 +1,121 @@
+# tests/test_cache.py
+
+import sys
+import threading
+
+import pytest
+
+from backend.app.utils import cache as cache_module
+from backend.app.utils.cache import MISSING, SQLiteCache, TTLCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make(request, tmp_path):
+    names = []
+
+    def build(name: str, **kwargs):
+        names.append(name)
+        if request.param == "sqlite":
+            return SQLiteCache(name, path=str(tmp_path / "cache.db"), **kwargs)
+        return TTLCache(name, **kwargs)
+
+    yield build
+    # Test caches must not linger in the registry the app's caches share
+    for name in names:
+        cache_module._REGISTRY.pop(name, None)
+
+
+def test_expired_entry_is_a_miss_but_can_be_served_stale(make):
+    cache = make("expiry", ttl=60, stale_ttl=3600)
+    cache.set("fresh", 1)
+    cache.set("expired", 2, ttl=-1)
+
+    assert cache.get("fresh") == 1
+    assert cache.get("expired") is None
+    value, expires_at = cache.get_entry("expired")
+    assert value == 2 and expires_at is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_entries_past_the_stale_window_are_dropped(make):
+    cache = make("stale", ttl=60, stale_ttl=0)
+    cache.set("gone", 1, ttl=-1)
+    cache.set("kept", 2)
+
+    assert cache.get_entry("gone") == (MISSING, None)
+    cache.set("gone_too", 3, ttl=-1)
+    assert cache.expire() == 1
+    assert cache.keys() == ["kept"]
+    assert cache.stats()["expirations"] == 2
+
+
+def test_least_recently_used_entries_are_evicted(make):
+    cache = make("lru", maxsize=3)
+    cache.EVICT_EVERY = 1
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    cache.get("a")
+    if isinstance(cache, SQLiteCache):
+        # accessed_at is only rewritten after TOUCH_INTERVAL; age b and c instead
+        cache._connect().execute("UPDATE cache_entries SET accessed_at = accessed_at - 120 WHERE key != 'a'")
+    cache.set("d", "d")
+
+    assert sorted(cache.keys()) == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_counters_are_exact_under_concurrent_lookups(make):
+    cache = make("counters")
+    cache.set("key", "value")
+
+    def read():
+        for _ in range(2000):
+            cache.get("key")
+            cache.get("absent")
+
+    # Switch threads often so unguarded read-modify-write counters would lose updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (16000, 16000)
+
+
+@pytest.fixture
+def ttl_cache():
+    cache = TTLCache("ttl_heap", maxsize=4, ttl=60, stale_ttl=0)
+    yield cache
+    cache_module._REGISTRY.pop("ttl_heap", None)
+
+
+def test_expire_skips_entries_rewritten_with_a_later_expiry(ttl_cache):
+    ttl_cache.set("key", "old", ttl=-1)
+    # The heap still holds the old, overdue expiry for this key
+    ttl_cache.set("key", "new")
+    assert ttl_cache.expire() == 0
+    assert ttl_cache.get("key") == "new"
+
+
+def test_expiry_heap_stays_bounded_under_rewrites(ttl_cache):
+    for i in range(100):
+        ttl_cache.set(f"key{i % 3}", i)
+    assert len(ttl_cache) == 3
+    assert len(ttl_cache._expiry) <= 2 * ttl_cache.maxsize + 1
+    assert ttl_cache.get("key0") == 99
+
+
+def test_delete_where_and_flush(ttl_cache):
+    for name in ("interactions:a,b", "interactions:b,c", "med_info:a"):
+        ttl_cache.set(name, 1)
+    assert ttl_cache.delete_where(lambda key: key.startswith("interactions:")) == 2
+    assert ttl_cache.keys() == ["med_info:a"]
+    cache_module.flush_all()
+    assert len(ttl_cache) == 0
@@ -0,0 +1,45 @@
+# tests/test_cache_warmer.py
+
+import json
+
+import pytest
+
+from backend.app import cache_warmer, explanation_precompute
+
+
+def _export(tmp_path, medication_lists) -> str:
+    path = tmp_path / "query_log.ndjson"
+    lines = [json.dumps({"log_id": f"log_x_{i:06x}", "medications": meds}) for i, meds in enumerate(medication_lists)]
+    path.write_text("\n".join(lines) + "\n{\"medications\": [\"torn")
+    return str(path)
+
+
+def test_warm_list_ranks_an_exported_query_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_warmer, "golden_set_medications", lambda: ["aspirin"])
+    path = _export(tmp_path, [["metformin", "warfarin"], ["Warfarin", "lisinopril"], ["warfarin"], ["Aspirin"]])
+
+    assert cache_warmer.warm_list(3, path) == ["aspirin", "warfarin", "metformin"]
+
+
+def test_short_list_is_reported(capsys):
+    cache_warmer.warn_if_short(["aspirin"], 300)
+    assert "only 1 medications found (requested 300)" in capsys.readouterr().err
+
+
+def test_precompute_cli_needs_a_medication_source(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "key")
+    with pytest.raises(SystemExit):
+        explanation_precompute.main(["--top", "300"])
+
+
+def test_precompute_cli_reads_the_exported_log(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("GEMINI_API_KEY", "key")
+    monkeypatch.setattr(cache_warmer, "golden_set_medications", lambda: [])
+    requested = []
+    monkeypatch.setattr(explanation_precompute, "precompute",
+                        lambda medications, *args: requested.extend(medications) or {"processed": 0})
+
+    explanation_precompute.main(["--top", "5", "--query-log", _export(tmp_path, [["warfarin"], ["aspirin", "warfarin"]])])
+
+    assert requested == ["warfarin", "aspirin"]
+    assert "only 2 medications found (requested 5)" in capsys.readouterr().err
@@ -0,0 +1,29 @@
+# tests/test_fuzzy.py
+
+from backend.app.label_store import LabelStore
+from backend.app.synonym_index import SynonymIndex, build_synonym_index
+from backend.app.utils.fuzzy import TrigramIndex
+
+NAMES = ["metformin", "metoprolol", "methotrexate", "warfarin", "ibuprofen", "lisinopril"]
+
+
+def test_search_ranks_the_closest_spelling_first():
+    index = TrigramIndex(NAMES)
+    assert index.search("metfromin")[0][0] == "metformin"
+    assert index.search("ibuprofin")[0][0] == "ibuprofen"
+
+
+def test_names_sharing_too_few_trigrams_are_not_candidates():
+    index = TrigramIndex(NAMES)
+    # Shares only the leading "me" trigrams with the met- names
+    assert index.search("mexxxxxx", min_score=0.0) == []
+    assert index.search("zzzz") == []
+
+
+def test_trigram_index_is_built_with_the_synonym_map(label_store, make_label):
+    path = label_store([make_label("m1", "metformin hydrochloride", ["Glucophage"])])
+    build_synonym_index(path)
+    synonyms = SynonymIndex(LabelStore(path))
+    assert synonyms.resolve("glucophage") == "metformin"
+    assert len(synonyms._fuzzy) == len(synonyms)
+    assert synonyms.suggest("glucophag")[0]["canonical"] == "metformin"
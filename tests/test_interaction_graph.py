@@ -0,0 +1,83 @@
+# tests/test_interaction_graph.py
+
+import pytest
+
+from backend.app.interaction_graph import build_graph, InteractionGraph
+from backend.app.label_store import LabelStore
+from backend.app.rag_service import RAGService
+
+
+@pytest.fixture
+def corpus(make_label):
+    return [
+        # Names warfarin only by its brand
+        make_label("a1", "aspirin", ["Bayer"], "Concomitant use with Coumadin may increase the risk of bleeding."),
+        make_label("w1", "warfarin", ["Coumadin"], "Monitor INR closely when starting or stopping antibiotics."),
+        make_label("m1", "metformin hydrochloride", ["Glucophage"], "Carbonic anhydrase inhibitors such as topiramate."),
+    ]
+
+
+def _service(path: str) -> RAGService:
+    return RAGService(label_store=LabelStore(path))
+
+
+def test_brand_name_mention_is_an_edge(label_store, corpus):
+    path = label_store(corpus)
+    assert build_graph(path)["edges"] == 1
+
+    graph = InteractionGraph(LabelStore(path))
+    assert graph.edge("warfarin", "aspirin") is not None
+    assert [n["drug"] for n in graph.neighbors("warfarin")] == ["aspirin"]
+    assert "Coumadin" in graph.passage(graph.edge("aspirin", "warfarin"))
+
+
+@pytest.mark.parametrize("medications", [
+    ["warfarin", "aspirin"],
+    ["Coumadin", "Bayer"],
+    ["warfarin", "aspirin", "metformin hydrochloride"],
+])
+def test_graph_agrees_with_label_scan(label_store, corpus, medications):
+    path = label_store(corpus)
+    scanned = _service(path).check_interactions(medications)
+    assert not _service(path).interaction_graph.is_available()
+
+    build_graph(path)
+    from backend.app.utils import cache
+    cache.flush_all()
+    indexed = _service(path).check_interactions(medications)
+    assert _service(path).interaction_graph.is_available()
+
+    severities = lambda result: [(i["drug1"], i["drug2"], i["severity"]) for i in result["interactions"]]
+    assert severities(indexed) == severities(scanned)
+    assert indexed["total_interactions"] == 1
+
+
+def test_abbreviations_are_not_scanned_for(label_store, make_label):
+    path = label_store([
+        make_label("a1", "aspirin", ["Bayer"]),
+        make_label("w1", "warfarin sodium", ["Coumadin"], "Patients on ASA therapy should be monitored."),
+    ])
+    assert build_graph(path)["edges"] == 0
+
+
+def test_reverse_lookup_reads_each_source_label_once(label_store, make_label, monkeypatch):
+    path = label_store([
+        make_label("w1", "warfarin", ["Coumadin"],
+                   "Aspirin increases bleeding. Metformin is unaffected."),
+        make_label("a1", "aspirin"),
+        make_label("i1", "ibuprofen", ["Advil"], "Warfarin: monitor INR."),
+        make_label("m1", "metformin"),
+    ])
+    build_graph(path)
+    service = _service(path)
+    reads = []
+    get_labels = service.label_store.get_labels
+    monkeypatch.setattr(service.label_store, "get_labels", lambda set_ids: reads.append(set_ids) or get_labels(set_ids))
+    monkeypatch.setattr(service.label_store, "get_label", lambda set_id: pytest.fail("per-neighbor label read"))
+
+    result = service.interacting_drugs("Coumadin")
+    passages = {entry["drug"]: entry["passage"] for entry in result["interacts_with"]}
+    assert sorted(passages) == ["aspirin", "ibuprofen", "metformin"]
+    assert passages["aspirin"].startswith("Aspirin increases bleeding")
+    assert passages["ibuprofen"] == "Warfarin: monitor INR."
+    assert reads == [["i1", "w1"]]
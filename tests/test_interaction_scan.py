@@ -0,0 +1,58 @@
+# tests/test_interaction_scan.py
+
+import pytest
+
+from backend.app.label_store import LabelStore
+from backend.app.rag_service import RAGService
+from backend.app.synonym_index import build_synonym_index
+
+
+@pytest.fixture
+def store_path(label_store, make_label):
+    path = label_store([
+        make_label("w1", "warfarin sodium", ["Coumadin"]),
+        make_label("a1", "aspirin", ["Bayer"], "Warfarin: increased bleeding."),
+    ])
+    build_synonym_index(path)
+    return path
+
+
+def _severity(path: str, medications) -> str:
+    result = RAGService(label_store=LabelStore(path)).check_interactions(medications)
+    return result["interactions"][0]["severity"]
+
+
+@pytest.mark.parametrize("name", ["Coumadin", "warfarin sodium", "warfarin"])
+def test_label_scan_matches_every_name_of_the_drug(store_path, name):
+    assert _severity(store_path, [name, "aspirin"]) == "major"
+
+
+@pytest.mark.parametrize("first, second", [
+    (["Coumadin", "aspirin"], ["warfarin", "aspirin"]),
+    (["warfarin", "aspirin"], ["Coumadin", "aspirin"]),
+    (["warfarin sodium", "Bayer"], ["COUMADIN", "aspirin"]),
+])
+def test_memoized_pair_does_not_depend_on_the_first_spelling(store_path, first, second):
+    # Same process-wide pair cache for both checks; the second is answered from it
+    service = RAGService(label_store=LabelStore(store_path))
+    assert service.check_interactions(first)["interactions"][0]["severity"] == "major"
+    assert service.check_interactions(second)["interactions"][0]["severity"] == "major"
+
+
+def test_every_spelling_reads_the_same_label(store_path):
+    service = RAGService(label_store=LabelStore(store_path))
+    labels = {service._find_local_label(name)["set_id"] for name in ("Coumadin", "warfarin", "warfarin sodium")}
+    assert labels == {"w1"}
+
+
+def test_pair_result_does_not_depend_on_which_label_a_spelling_finds(label_store, make_label):
+    path = label_store([
+        make_label("w1", "warfarin sodium", [], "Aspirin increases the risk of bleeding.", effective_time="20240101"),
+        # An older brand label without the interaction section
+        make_label("w2", "warfarin sodium", ["Coumadin"], effective_time="20230101"),
+        make_label("a1", "aspirin", ["Bayer"]),
+    ])
+    build_synonym_index(path)
+    service = RAGService(label_store=LabelStore(path))
+    assert service.check_interactions(["Coumadin", "aspirin"])["interactions"][0]["severity"] == "major"
+    assert service.check_interactions(["warfarin sodium", "aspirin"])["interactions"][0]["severity"] == "major"
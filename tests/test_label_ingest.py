@@ -0,0 +1,57 @@
+# tests/test_label_ingest.py
+
+import json
+import zipfile
+
+import pytest
+
+from backend.app import label_ingest
+from backend.app.label_ingest import ResultsArrayScanner, iter_raw_labels
+
+LABELS = [
+    {"set_id": "a1", "openfda": {"generic_name": ["ASPIRIN"]},
+     "drug_interactions": ['Avoid {braces} and [brackets] in "quoted" text \\ with escapes']},
+    {"set_id": "b2", "results": [{"nested": "not a label"}], "note": "ends with a backslash \\"},
+    {"set_id": "c3", "openfda": {}, "description": ["Unicode: é, µg, — and \\u00e9"]},
+]
+DOCUMENT = json.dumps({
+    "meta": {"results": {"skip": 0, "total": 3}, "note": '[not] {the} "results"'},
+    "results": LABELS,
+}, ensure_ascii=False)
+
+
+def _scan(chunks) -> list:
+    scanner = ResultsArrayScanner()
+    items = []
+    for chunk in chunks:
+        items.extend(scanner.feed(chunk))
+    return [json.loads(item) for item in items]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(DOCUMENT)])
+def test_labels_split_across_fixed_size_chunks(size):
+    chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+    assert _scan(chunks) == LABELS
+
+
+def test_labels_split_at_every_boundary():
+    for cut in range(1, len(DOCUMENT)):
+        assert _scan([DOCUMENT[:cut], DOCUMENT[cut:]]) == LABELS, cut
+
+
+def test_only_the_unfinished_label_is_buffered():
+    scanner = ResultsArrayScanner()
+    end_of_first = DOCUMENT.index('"a1"')
+    end_of_first = DOCUMENT.index("}, {", end_of_first) + 1
+    items = scanner.feed(DOCUMENT[:end_of_first + 10])
+    assert [json.loads(item)["set_id"] for item in items] == ["a1"]
+    assert len(scanner.buf) <= 10
+
+
+def test_zip_members_stream_in_small_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(label_ingest, "CHUNK_SIZE", 5)
+    path = str(tmp_path / "drug-label-0001-of-0001.json.zip")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("drug-label-0001-of-0001.json", DOCUMENT)
+        zf.writestr("README.txt", "not json")
+    assert [json.loads(raw) for raw in iter_raw_labels(path)] == LABELS
@@ -0,0 +1,66 @@
+# tests/test_label_lookup.py
+
+import asyncio
+
+import pytest
+
+from backend.app import functions as funcs, rag_service
+from backend.app.label_store import LabelStore
+from backend.app.rag_service import RAGService
+
+
+def _service(tmp_path, monkeypatch, make_label):
+    service = RAGService(label_store=LabelStore(str(tmp_path / "empty.db")))
+    service.live_fallback = True
+    calls = []
+
+    def fetch_batch(medications, timeout=None):
+        calls.append(list(medications))
+        return {med: make_label(f"{med}-id", med) for med in medications}
+
+    def search_one(medication_name):
+        raise AssertionError(f"unexpected per-name lookup for {medication_name}")
+
+    monkeypatch.setattr(service, "_fetch_openfda_drug_labels", fetch_batch)
+    monkeypatch.setattr(service, "_search_openfda_drug_label", search_one)
+    return service, calls
+
+
+def test_batched_lookup_writes_labels_back_to_the_cache(tmp_path, monkeypatch, make_label):
+    service, calls = _service(tmp_path, monkeypatch, make_label)
+
+    labels, timed_out = service._lookup_labels(["warfarin", "aspirin"])
+    assert calls == [["warfarin", "aspirin"]]
+    assert timed_out == []
+    assert labels["aspirin"]["set_id"] == "aspirin-id"
+    assert rag_service._LABEL_CACHE.get(service.canonical_name("warfarin"))["set_id"] == "warfarin-id"
+
+
+def test_warm_batched_lookup_makes_no_upstream_call(tmp_path, monkeypatch, make_label):
+    service, calls = _service(tmp_path, monkeypatch, make_label)
+    service._lookup_labels(["warfarin", "aspirin"])
+
+    labels, _ = service._lookup_labels(["aspirin", "warfarin"])
+    assert len(calls) == 1
+    assert sorted(labels) == ["aspirin", "warfarin"]
+
+    # Only the name not seen before is fetched
+    service._lookup_labels(["aspirin", "warfarin", "ibuprofen", "metformin"])
+    assert calls[1:] == [["ibuprofen", "metformin"]]
+
+
+@pytest.mark.parametrize("name", [None, "", "   ", 42])
+@pytest.mark.parametrize("call", [
+    funcs.get_medication_info,
+    funcs.generate_explanation,
+    funcs.get_interacting_drugs,
+    lambda name: asyncio.run(funcs.generate_explanation_async(name)),
+])
+def test_missing_medication_name_is_an_error_result(call, name, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "key")
+    assert call(name) == {"status": "error", "message": "medication_name is required"}
+
+
+@pytest.mark.parametrize("medications", [None, "warfarin", ["warfarin", None]])
+def test_malformed_medication_lists_are_an_error_result(medications):
+    assert funcs.check_multiple_interactions(medications)["status"] == "error"
@@ -0,0 +1,101 @@
+# tests/test_label_sync.py
+
+import threading
+
+from backend.app import functions as funcs
+from backend.app.interaction_graph import build_graph, graph_exists, InteractionGraph
+from backend.app.label_ingest import change_entry, change_list, select_changed
+from backend.app.label_store import LabelStore, label_row
+from backend.app.rag_service import RAGService
+from backend.app.synonym_index import build_synonym_index
+
+
+def test_change_list_includes_names_a_label_dropped(label_store, make_label):
+    path = label_store([make_label("i1", "ibuprofen", ["Advil"])])
+    store = LabelStore(path)
+    row = label_row(make_label("i1", "ibuprofen", ["Motrin"], effective_time="20250101"))
+    unchanged = label_row(make_label("i1", "ibuprofen", ["Advil"]))
+
+    stored = store.get_versions(["i1"])
+    assert select_changed(stored, [unchanged]) == []
+    assert select_changed(stored, [row]) == [row]
+
+    entry = change_entry(stored, store.get_names(["i1"]), row)
+    assert entry["change"] == "updated"
+    assert entry["previous_names"] == ["advil"]
+    assert change_list([entry])["medications"] == ["advil", "ibuprofen", "motrin"]
+
+
+def test_invalidation_matches_cached_lists_by_canonical_drug(label_store, make_label, monkeypatch):
+    path = label_store([
+        make_label("i1", "ibuprofen", ["Advil"]),
+        make_label("w1", "warfarin", ["Coumadin"], "Avoid NSAIDs such as ibuprofen."),
+    ])
+    build_graph(path)
+    assert graph_exists(path)
+    monkeypatch.setattr(funcs, "rag", RAGService(label_store=LabelStore(path)))
+
+    funcs._INTERACTION_CACHE.set("interactions:advil,warfarin", {"status": "success", "data": {}})
+    funcs._INTERACTION_CACHE.set("interactions:metformin,warfarin", {"status": "success", "data": {}})
+    funcs.invalidate_medications(["ibuprofen"])
+
+    assert funcs._INTERACTION_CACHE.get("interactions:advil,warfarin") is None
+    assert funcs._INTERACTION_CACHE.get("interactions:metformin,warfarin") is not None
+
+
+def test_invalidation_resolves_names_against_the_rebuilt_index(label_store, make_label, monkeypatch):
+    path = label_store([make_label("i1", "ibuprofen")])
+    build_synonym_index(path)
+    monkeypatch.setattr(funcs, "rag", RAGService(label_store=LabelStore(path)))
+    funcs._MED_INFO_CACHE.set("med_info:ibuprofen", {"status": "success", "data": {}})
+
+    # The sync adds "Advil" to the label; only the rebuilt index maps it to ibuprofen
+    LabelStore(path).upsert_labels([make_label("i1", "ibuprofen", ["Advil"], effective_time="20250101")])
+    build_synonym_index(path)
+    funcs.invalidate_medications(["Advil"])
+
+    assert funcs._MED_INFO_CACHE.get("med_info:ibuprofen") is None
+
+
+def test_other_workers_reload_after_an_index_rebuild(label_store, make_label):
+    path = label_store([make_label("w1", "warfarin", ["Coumadin"])])
+    build_synonym_index(path)
+    worker = RAGService(label_store=LabelStore(path))
+    assert not worker.extract_medication_info("Advil")["found"]
+    assert worker.sync_indexes() is False
+
+    # Another process ingests a new label; this worker never sees the invalidation request
+    LabelStore(path).upsert_labels([make_label("i1", "ibuprofen", ["Advil"])])
+    build_synonym_index(path)
+
+    assert worker.sync_indexes() is True
+    assert worker.canonical_name("Advil") == "ibuprofen"
+    assert worker.extract_medication_info("Advil")["found"]
+
+
+def test_graph_reload_keeps_serving_the_old_graph_until_the_swap(label_store, make_label):
+    path = label_store([
+        make_label("a1", "aspirin", ["Bayer"], "Warfarin: increased bleeding."),
+        make_label("w1", "warfarin"),
+    ])
+    build_graph(path)
+    graph = InteractionGraph(LabelStore(path))
+    assert graph.edge("aspirin", "warfarin") is not None
+
+    reading = threading.Event()
+    release = threading.Event()
+    read_graph = graph._read_graph
+
+    def slow_read():
+        reading.set()
+        release.wait(5)
+        return read_graph()
+
+    graph._read_graph = slow_read
+    reloader = threading.Thread(target=graph.reload)
+    reloader.start()
+    assert reading.wait(5)
+    assert [n["drug"] for n in graph.neighbors("warfarin")] == ["aspirin"]
+    release.set()
+    reloader.join(5)
+    assert graph.edge("aspirin", "warfarin") is not None
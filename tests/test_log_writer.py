@@ -0,0 +1,48 @@
+# tests/test_log_writer.py
+
+import os
+import glob
+import gzip
+import json
+
+from backend.app.usage_analytics import log_files
+from backend.app.utils.log_writer import BufferedLogWriter
+
+
+def _read_all(path: str) -> list:
+    records = []
+    for name in log_files(path):
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(name, "rt") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def test_rotated_files_are_compressed_without_losing_records(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+    writer = BufferedLogWriter(path, batch_size=10, max_bytes=2000, compress=True)
+    for i in range(200):
+        writer.write({"n": i, "padding": "x" * 40})
+    writer.close()
+
+    assert writer.stats()["rotations"] > 1
+    assert writer.stats()["compressed"] == writer.stats()["rotations"]
+    assert sorted(r["n"] for r in _read_all(path)) == list(range(200))
+    # No partial or uncompressed rotated files are left behind
+    assert not glob.glob(str(tmp_path / ".*"))
+    assert all(name.endswith(".gz") for name in log_files(path) if name != path)
+
+
+def test_writers_sharing_a_file_rotate_it_once(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+    writers = [BufferedLogWriter(path, batch_size=5, max_bytes=1500) for _ in range(3)]
+    for i in range(300):
+        writers[i % 3].write({"n": i, "padding": "x" * 40})
+    for writer in writers:
+        writer.close()
+
+    assert sorted(r["n"] for r in _read_all(path)) == list(range(300))
+    rotated = [name for name in log_files(path) if name != path]
+    assert sum(w.stats()["rotations"] for w in writers) == len(rotated)
+    # A file just rotated by another writer is not rotated again while still small
+    assert all(os.path.getsize(name) >= 1500 for name in rotated)
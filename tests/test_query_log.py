@@ -0,0 +1,62 @@
+# tests/test_query_log.py
+
+import os
+
+import pytest
+
+from backend.app.utils.query_log import QueryLog
+
+
+def _fill(log: QueryLog, count: int):
+    for i in range(count):
+        log.append([f"drug{i}", "aspirin"], i % 3, "major")
+
+
+def test_pages_follow_the_cursor_across_ring_wrap():
+    log = QueryLog(5)
+    _fill(log, 3)
+    first = log.page(0, 2)
+    assert [r.seq for r in first["records"]] == [1, 2]
+    assert first["has_more"] and first["skipped"] == 0
+
+    # Eight more records wrap the ring past the cursor: seqs 3..6 are overwritten
+    _fill(log, 8)
+    second = log.page(first["next_cursor"], 2)
+    assert [r.seq for r in second["records"]] == [7, 8]
+    assert second["skipped"] == 4
+
+    third = log.page(second["next_cursor"], 10)
+    assert [r.seq for r in third["records"]] == [9, 10, 11]
+    assert not third["has_more"]
+    assert log.page(third["next_cursor"], 10)["records"] == []
+    assert log.page(third["next_cursor"], 10)["next_cursor"] == 11
+
+
+def test_iteration_returns_retained_records_oldest_first():
+    log = QueryLog(4)
+    _fill(log, 10)
+    assert len(log) == 4
+    assert [r.medications[0] for r in log] == ["drug6", "drug7", "drug8", "drug9"]
+
+
+def test_log_ids_do_not_collide_across_logs():
+    first, second = QueryLog(10), QueryLog(10)
+    a, b = first.append(["warfarin"], 0), second.append(["warfarin"], 0)
+    assert a.seq == b.seq == 1
+    assert a.log_id != b.log_id
+    assert a.to_dict()["log_id"].startswith(f"log_{first.token}_")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_workers_get_their_own_token():
+    log = QueryLog(10)
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, log.token.encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child_token = os.read(read, 64).decode()
+    os.close(read)
+    os.close(write)
+    assert child_token and child_token != log.token
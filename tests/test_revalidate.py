@@ -0,0 +1,179 @@
+# tests/test_revalidate.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.app.utils import cache as cache_module, revalidate, singleflight
+from backend.app.utils.cache import TTLCache
+from backend.app.utils.revalidate import cached_load, cached_load_async
+from backend.app.utils.singleflight import AsyncSingleFlight, SingleFlight
+
+GOOD = {"status": "success", "value": "old"}
+FAILED = {"status": "error"}
+
+# Expired, but recent enough to be served while a background refresh runs
+REVALIDATE_AGE = 10
+# Too old to serve unless reloading fails
+IF_ERROR_AGE = revalidate.CACHE_STALE_WHILE_REVALIDATE + 10
+
+
+def _is_error(result) -> bool:
+    return result.get("status") == "error"
+
+
+@pytest.fixture
+def cache():
+    ttl_cache = TTLCache("test_revalidate", ttl=60, stale_ttl=IF_ERROR_AGE * 2)
+    yield ttl_cache
+    cache_module._REGISTRY.pop("test_revalidate", None)
+
+
+@pytest.fixture
+def flight():
+    group = SingleFlight("test_revalidate")
+    yield group
+    singleflight._REGISTRY.pop("test_revalidate", None)
+
+
+def _age(cache, key, value, seconds: float):
+    cache.set(key, value, ttl=-seconds)
+
+
+def _wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_fresh_entry_is_returned_without_loading(cache, flight):
+    cache.set("k", GOOD)
+    lookup = cached_load(cache, flight, "k", lambda: pytest.fail("loaded a fresh entry"))
+    assert lookup == (GOOD, False, True)
+
+
+def test_revalidate_window_serves_stale_and_refreshes_once_in_the_background(cache, flight):
+    _age(cache, "k", GOOD, REVALIDATE_AGE)
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {"status": "success", "value": "new"}
+
+    lookups = [cached_load(cache, flight, "k", load, is_error=_is_error) for _ in range(5)]
+    # Every caller got the stale value at once; only one refresh was started
+    assert all(lookup == (GOOD, True, True) for lookup in lookups)
+    release.set()
+
+    assert _wait_for(lambda: cache.get("k") == {"status": "success", "value": "new"})
+    assert len(calls) == 1
+    assert _wait_for(lambda: not revalidate._REFRESHING)
+
+
+def test_failed_background_refresh_keeps_the_stale_entry(cache, flight):
+    _age(cache, "k", GOOD, REVALIDATE_AGE)
+    done = threading.Event()
+
+    def load():
+        done.set()
+        return FAILED
+
+    assert cached_load(cache, flight, "k", load, is_error=_is_error).value == GOOD
+    assert done.wait(5)
+    assert _wait_for(lambda: not revalidate._REFRESHING)
+    assert cache.get_entry("k")[0] == GOOD
+
+
+def test_stale_if_error_when_load_raises(cache, flight):
+    _age(cache, "k", GOOD, IF_ERROR_AGE)
+
+    def load():
+        raise ConnectionError("upstream down")
+
+    assert cached_load(cache, flight, "k", load, is_error=_is_error) == (GOOD, True, True)
+    assert cache.get_entry("k")[0] == GOOD
+
+
+def test_stale_if_error_when_load_returns_an_error(cache, flight):
+    _age(cache, "k", GOOD, IF_ERROR_AGE)
+
+    lookup = cached_load(cache, flight, "k", lambda: FAILED, is_error=_is_error, cache_errors=True)
+    assert lookup == (GOOD, True, True)
+    # The failure never replaces the good entry, even with cache_errors set
+    assert cache.get_entry("k")[0] == GOOD
+
+
+def test_error_without_a_stale_entry_is_raised(cache, flight):
+    def load():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        cached_load(cache, flight, "k", load, is_error=_is_error)
+    assert cache.get_entry("k")[0] is cache_module.MISSING
+
+
+def test_failures_are_not_cached_by_default(cache, flight):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return FAILED
+
+    cached_load(cache, flight, "k", load, is_error=_is_error)
+    assert cached_load(cache, flight, "k", load, is_error=_is_error) == (FAILED, False, False)
+    assert len(calls) == 2
+
+
+def test_negative_entries_use_their_own_ttl(cache, flight):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return FAILED
+
+    cached_load(cache, flight, "k", load, is_error=_is_error, cache_errors=5)
+    value, expires_at = cache.get_entry("k")
+    assert value == FAILED
+    assert expires_at - time.time() == pytest.approx(5, abs=1)
+    assert cached_load(cache, flight, "k", load, is_error=_is_error, cache_errors=5) == (FAILED, False, True)
+    assert len(calls) == 1
+
+
+def test_expired_negative_entry_is_never_served_stale(cache, flight):
+    _age(cache, "k", FAILED, REVALIDATE_AGE)
+    lookup = cached_load(cache, flight, "k", lambda: GOOD, is_error=_is_error)
+    # Reloaded in the foreground instead of serving the old failure
+    assert lookup == (GOOD, False, False)
+    assert cache.get("k") == GOOD
+
+
+def test_async_revalidate_refreshes_in_a_task(cache):
+    flight = AsyncSingleFlight("test_revalidate_async")
+    _age(cache, "k", GOOD, REVALIDATE_AGE)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"status": "success", "value": "new"}
+
+    async def run():
+        lookups = [await cached_load_async(cache, flight, "k", load, is_error=_is_error) for _ in range(3)]
+        while revalidate._ASYNC_REFRESHES:
+            await asyncio.sleep(0.01)
+        return lookups
+
+    try:
+        lookups = asyncio.run(run())
+        assert all(lookup == (GOOD, True, True) for lookup in lookups)
+        assert len(calls) == 1
+        assert cache.get("k") == {"status": "success", "value": "new"}
+    finally:
+        singleflight._REGISTRY.pop("test_revalidate_async", None)
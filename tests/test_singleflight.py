@@ -0,0 +1,105 @@
+# tests/test_singleflight.py
+
+import threading
+import time
+
+import pytest
+
+from backend.app.utils import cache as cache_module, singleflight
+from backend.app.utils.cache import TTLCache
+from backend.app.utils.revalidate import cached_load
+from backend.app.utils.singleflight import SingleFlight
+
+
+@pytest.fixture
+def flight():
+    group = SingleFlight("test")
+    yield group
+    singleflight._REGISTRY.pop("test", None)
+
+
+def _run_concurrently(count: int, target) -> list:
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def run(i):
+        start.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_share_one_execution(flight):
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = _run_concurrently(8, lambda: flight.do("key", load))
+    timer.cancel()
+
+    assert len(calls) == 1
+    assert all(result == {"value": 42} for result in results)
+    assert results[0] is results[1]
+    stats = flight.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (1, 7, 0)
+
+
+def test_waiters_receive_the_leaders_exception(flight):
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = _run_concurrently(4, lambda: flight.do("key", load))
+    timer.cancel()
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["executed"] == 1
+    # The failed call is not remembered; the next caller runs again
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_different_keys_run_independently(flight):
+    def load(key):
+        time.sleep(0.05)
+        return key
+
+    results = _run_concurrently(6, lambda: flight.do(threading.current_thread().name, load,
+                                                     threading.current_thread().name))
+    assert len(set(results)) == 6
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_cached_load_misses_reach_upstream_once(flight):
+    cache = TTLCache("test_flight_cache")
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"status": "success"}
+
+    try:
+        results = _run_concurrently(8, lambda: cached_load(cache, flight, "med_info:aspirin", load))
+        assert len(calls) == 1
+        assert all(result.value == {"status": "success"} for result in results)
+        assert cached_load(cache, flight, "med_info:aspirin", load).hit
+    finally:
+        cache_module._REGISTRY.pop("test_flight_cache", None)
@@ -0,0 +1,76 @@
+# tests/test_synonym_index.py
+
+import pytest
+
+from backend.app.interaction_graph import build_graph
+from backend.app.label_store import LabelStore
+from backend.app.rag_service import RAGService
+from backend.app.synonym_index import SynonymIndex, build_synonym_index
+
+
+def test_prefix_index_is_built_with_the_synonym_map(label_store, make_label):
+    path = label_store([
+        make_label("m1", "metformin hydrochloride", ["Glucophage"]),
+        make_label("m2", "metformin hydrochloride", ["Glumetza"]),
+        make_label("p1", "metoprolol tartrate", ["Lopressor"]),
+    ])
+    build_synonym_index(path)
+    synonyms = SynonymIndex(LabelStore(path))
+    assert synonyms.is_available()
+    assert synonyms._prefix is not None
+
+    completions = synonyms.complete("met")
+    # Found on two labels, so ranked ahead of metoprolol
+    assert completions[0] == {"name": "metformin hydrochloride", "canonical": "metformin"}
+    assert [c["canonical"] for c in completions] == ["metformin", "metoprolol"]
+
+
+def test_reload_rebuilds_the_name_indexes(label_store, make_label):
+    path = label_store([make_label("m1", "metformin hydrochloride", ["Glucophage"])])
+    build_synonym_index(path)
+    store = LabelStore(path)
+    synonyms = SynonymIndex(store)
+    assert synonyms.complete("lis") == []
+
+    store.upsert_labels([make_label("l1", "lisinopril", ["Zestril"])])
+    build_synonym_index(path)
+    synonyms.reload()
+    assert synonyms.complete("lis") == [{"name": "lisinopril", "canonical": "lisinopril"}]
+    assert synonyms.suggest("lisinoprl")[0]["canonical"] == "lisinopril"
+
+
+@pytest.fixture
+def salt_form_corpus(label_store, make_label):
+    path = label_store([
+        make_label("i1", "ibuprofen", ["Advil"],
+                   "Lithium: NSAIDs have produced elevations of plasma lithium levels. "
+                   "Corticosteroids: fluticasone and other steroids increase the risk of GI bleeding."),
+        make_label("l1", "lithium carbonate", ["Lithobid"]),
+        make_label("d1", "doxycycline hyclate", ["Vibramycin"]),
+        make_label("f1", "fluticasone propionate", ["Flovent"]),
+        make_label("e1", "escitalopram oxalate", ["Lexapro"]),
+        make_label("h1", "hydrocortisone sodium succinate", ["Solu-Cortef"]),
+        make_label("k1", "potassium chloride", ["K-Tab"]),
+    ])
+    build_graph(path)
+    return path
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("lithium", "lithium"),
+    ("Lithobid", "lithium"),
+    ("doxycycline", "doxycycline"),
+    ("fluticasone propionate", "fluticasone"),
+    ("escitalopram", "escitalopram"),
+    ("hydrocortisone", "hydrocortisone"),
+    ("potassium chloride", "potassium chloride"),
+])
+def test_salt_forms_resolve_to_the_base_drug(salt_form_corpus, name, canonical):
+    assert SynonymIndex(LabelStore(salt_form_corpus)).resolve(name) == canonical
+
+
+@pytest.mark.parametrize("medications", [["Advil", "lithium carbonate"], ["ibuprofen", "lithium"],
+                                         ["Advil", "Flovent"]])
+def test_label_mentions_of_the_base_drug_match_salt_forms(salt_form_corpus, medications):
+    result = RAGService(label_store=LabelStore(salt_form_corpus)).check_interactions(medications)
+    assert result["interactions"][0]["severity"] != "unknown"
@@ -0,0 +1,116 @@
+# tests/test_usage_analytics.py
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+from backend.app.usage_analytics import UsageAnalytics, parse_time
+
+
+def _line(i: int, endpoint: str = "/api/chat") -> bytes:
+    record = {"timestamp": f"2026-10-17T12:{i % 60:02d}:00Z", "endpoint": endpoint, "model": "gemini",
+              "tokens_input": 10, "tokens_output": 5, "cost_usd": 0.001, "latency_ms": 100 + i, "cache_hit": False}
+    return (json.dumps(record) + "\n").encode()
+
+
+def _append(path: str, lines):
+    with open(path, "ab") as f:
+        for line in lines:
+            f.write(line)
+
+
+@pytest.fixture
+def log(tmp_path):
+    return str(tmp_path / "cost_logs.jsonl")
+
+
+@pytest.fixture
+def analytics(tmp_path, log):
+    return UsageAnalytics(log, str(tmp_path / "usage_analytics.db"))
+
+
+def _calls(analytics: UsageAnalytics) -> int:
+    return analytics.query(bucket="total")["total"]["calls"]
+
+
+def test_partial_last_line_is_counted_once_complete(analytics, log):
+    _append(log, [_line(0), _line(1)])
+    partial = _line(2)
+    _append(log, [partial[:20]])
+    assert _calls(analytics) == 2
+
+    _append(log, [partial[20:]])
+    assert _calls(analytics) == 3
+    assert _calls(analytics) == 3
+
+
+def test_rotation_between_refreshes_keeps_counts_exact(analytics, log):
+    _append(log, [_line(i) for i in range(3)])
+    assert _calls(analytics) == 3
+
+    # More lines land in the active file, then it rotates before the next refresh
+    _append(log, [_line(i) for i in range(3, 5)])
+    os.rename(log, log + ".20261017T120000000000")
+    _append(log, [_line(i) for i in range(5, 9)])
+    assert _calls(analytics) == 9
+
+    _append(log, [_line(9)])
+    assert _calls(analytics) == 10
+
+
+def test_plain_and_gzipped_copies_are_counted_once(analytics, log):
+    _append(log, [_line(i) for i in range(4)])
+    assert _calls(analytics) == 4
+
+    # Mid-compression: the rotated file and its .gz both exist
+    rotated = log + ".20261017T120000000000"
+    os.rename(log, rotated)
+    with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    _append(log, [_line(4)])
+    assert _calls(analytics) == 5
+
+    os.remove(rotated)
+    assert _calls(analytics) == 5
+
+
+def test_gzipped_file_is_read_from_its_checkpoint(analytics, log):
+    _append(log, [_line(i) for i in range(2)])
+    assert _calls(analytics) == 2
+
+    # Lines appended before rotation are read from the compressed copy
+    _append(log, [_line(2)])
+    rotated = log + ".20261017T120000000000"
+    os.rename(log, rotated)
+    with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(rotated)
+    assert _calls(analytics) == 3
+
+
+def test_counts_per_endpoint_survive_rotation(analytics, log):
+    _append(log, [_line(0, "/api/chat"), _line(1, "/api/explain")])
+    analytics.refresh()
+    _append(log, [_line(2, "/api/explain")])
+    os.rename(log, log + ".20261017T120000000000")
+    _append(log, [_line(3, "/api/chat"), _line(4, "/api/chat")])
+
+    groups = analytics.query(bucket="total", group_by=["endpoint"])["groups"]
+    assert {g["endpoint"]: g["calls"] for g in groups} == {"/api/chat": 3, "/api/explain": 2}
+
+
+@pytest.mark.parametrize("value", ["2026-10-17T12:00:00+00:00", "2026-10-17T14:00:00+02:00",
+                                   "2026-10-17T12:00:00Z", "2026-10-17T12:00:00"])
+def test_parse_time_returns_naive_utc(value):
+    assert parse_time(value) == datetime(2026, 10, 17, 12)
+
+
+def test_query_renders_offset_times_as_utc(analytics, log):
+    _append(log, [_line(0)])
+    report = analytics.query(parse_time("2026-10-17T14:00:00+02:00"), bucket="total")
+    assert report["start"] == "2026-10-17T12:00:00Z"
+    assert report["total"]["calls"] == 1